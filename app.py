@@ -1,19 +1,27 @@
-from flask import Flask, request, jsonify, render_template
-import schedule
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
+import os
+import re
 import time
 from threading import Thread
 from utils.logger import setup_logging
-from utils.data_fetcher import fetch_market_data, fetch_sentiment_analysis
-from utils.model_trainer import load_models, prepare_prediction_data, predict, train_xgboost_model
-from utils.trading import initialize_mt5, get_account_state, get_open_trades, place_order, close_order, execute_trades, close_open_trades
-from config import load_config, save_config
+from utils.data_fetcher import fetch_market_data, fetch_sentiment_analysis, sentiment_cache
+from utils.model_trainer import load_models, prepare_prediction_data, predict, predict_batch, load_xgboost_models
+from utils.trading import initialize_mt5, take_snapshot, execute_trades, close_open_trades
+from utils.order_executor import OrderExecutor
+from utils.scheduler import Scheduler
+from utils.metrics import metrics, timed
+from utils.profiler import CycleProfiler
+from utils.log_reader import tail, follow
+from utils.optimizer_store import OptimizerStore, FILTERS
+from utils.config_cache import content_etag
+from config import load_config, save_config, config_cache
 
 app = Flask(__name__)
 
 # Configure logging
 logger = setup_logging('trading_app.log')
 
-# Load configuration
+# Startup settings; the trading loop re-reads the cached config every cycle
 config = load_config()
 
 # Initialize MetaTrader 5
@@ -23,7 +31,27 @@ if not initialize_mt5():
 # List of currency pairs
 currency_pairs = config['currency_pairs']
 
-models = load_models(currency_pairs)
+order_executor = OrderExecutor(config.get('order_interval', 1.0))
+scheduler = Scheduler()
+profiler_config = config.get('profiler', {})
+profiler = CycleProfiler(enabled=profiler_config.get('enabled', False), interval=profiler_config.get('interval', 0.005))
+optimizer_store = OptimizerStore(config.get('optimizer_db', 'data/optimizer.db'))
+optimizer_store.setup()
+
+start_time = time.perf_counter()
+models = load_models(
+    currency_pairs,
+    max_models=config.get('max_loaded_models'),
+    max_bytes=config.get('max_model_memory_mb', 0) * 1024 * 1024 or None,
+    reload_interval=config.get('model_reload_interval', 5)
+)
+xgb_models = load_xgboost_models(
+    currency_pairs,
+    refresh_interval=config.get('xgb_refresh_interval', 3600),
+    drift_threshold=config.get('xgb_drift_threshold', 0.1),
+    max_trees=config.get('xgb_max_trees', 300)
+)
+logger.info(f"Model registry ready in {time.perf_counter() - start_time:.3f}s, {len(models.available_pairs())} models available")
 
 @app.route('/')
 def index():
@@ -31,6 +59,7 @@ def index():
 
 @app.route('/configure', methods=['GET', 'POST'])
 def configure():
+    config = load_config()
     if request.method == 'POST':
         config['currency_pairs'] = request.form['currencyPairs'].split(',')
         config['trade_volume'] = float(request.form['tradeVolume'])
@@ -40,7 +69,16 @@ def configure():
         return jsonify({"status": "Configuration updated successfully"}), 200
     return render_template('config.html', config=config)
 
+@app.route('/config')
+def config_route():
+    # Clients send back the ETag as If-None-Match and get a 304 while the config is unchanged
+    version, etag, config = config_cache.versioned()
+    response = jsonify({'version': version, 'config': config})
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 @app.route('/predict', methods=['POST'])
+@timed('predict_route', failed=lambda result: result[1] >= 400)
 def predict_route():
     try:
         data = request.get_json(force=True)
@@ -61,30 +99,195 @@ def predict_route():
         logger.error(f"Error in prediction: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch_route():
+    try:
+        data = request.get_json(force=True)
+
+        if 'data' not in data or not isinstance(data['data'], dict):
+            return jsonify({"error": "Invalid input format"}), 400
+
+        predictions, errors = predict_batch(models, data['data'])
+
+        logger.info(f"Batch prediction for {len(predictions)} pairs, {len(errors)} errors")
+        return jsonify({'predictions': predictions, 'errors': errors}), 200
+    except Exception as e:
+        logger.error(f"Error in batch prediction: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/model_stats')
+def model_stats():
+    return jsonify(models.stats()), 200
+
+@app.route('/sentiment_stats')
+def sentiment_stats():
+    return jsonify(sentiment_cache.stats()), 200
+
+@app.route('/scheduler_stats')
+def scheduler_stats():
+    return jsonify(scheduler.stats()), 200
+
+@app.route('/metrics')
+def metrics_route():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Columns of the CSV form of /optimization, in the order the EA reads them
+OPTIMIZATION_CSV_COLUMNS = ['symbol', 'profit_factor', 'expected_payoff', 'trades', 'equity_dd', 'result', 'pass_number']
+MAX_OPTIMIZATION_PASSES = 10000
+
+def optimizer_query(args):
+    # Filters are the optimizer_store.FILTERS names with numeric values; symbol takes a comma-separated list
+    query = {name: float(args[name]) for name in FILTERS if args.get(name)}
+    query['symbols'] = args['symbol'].split(',') if args.get('symbol') else None
+    query['order_by'] = args.get('order_by', 'result')
+    return query
+
+def optimization_response(version, rows):
+    if request.args.get('format') == 'csv':
+        lines = [','.join(OPTIMIZATION_CSV_COLUMNS)]
+        lines += [','.join('' if row[column] is None else str(row[column]) for column in OPTIMIZATION_CSV_COLUMNS) for row in rows]
+        response = Response('\n'.join(lines) + '\n', mimetype='text/csv')
+    else:
+        response = jsonify({'version': version, 'passes': rows})
+    # The store version changes only when a report is ingested, so clients revalidate with If-None-Match for a 304
+    response.set_etag(content_etag({'version': version, 'args': request.args.to_dict()}))
+    return response.make_conditional(request)
+
+@app.route('/optimization')
+def optimization():
+    # Best optimizer pass per symbol, served from the store's per-version cache; the EA loads it once per session
+    try:
+        version, rows = optimizer_store.best(**optimizer_query(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return optimization_response(version, rows)
+
+@app.route('/optimization/passes')
+def optimization_passes():
+    # Every ingested pass matching the filters, ranked by order_by
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), MAX_OPTIMIZATION_PASSES))
+        version = optimizer_store.version()
+        rows = optimizer_store.query(limit=limit, **optimizer_query(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return optimization_response(version, rows)
+
+# Log files the viewer may open, looked up by name in these directories
+LOG_DIRS = ['logs', '.']
+MAX_LOG_LINES = 5000
+
+def log_path(name):
+    name = os.path.basename(name or 'trading_app.log')
+    if not name.endswith('.log'):
+        return None
+    for directory in LOG_DIRS:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def available_logs():
+    return sorted({f for directory in LOG_DIRS if os.path.isdir(directory) for f in os.listdir(directory) if f.endswith('.log')})
+
+def log_query(args):
+    # Raises ValueError for a bad level, pattern or count; returns None when the file does not exist
+    path = log_path(args.get('file'))
+    if path is None:
+        return None
+    level = args.get('level') or None
+    pattern = args.get('pattern') or None
+    if level and level.upper() not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+        raise ValueError(f"Unknown level {level}")
+    if pattern:
+        re.compile(pattern)
+    # Clamped to 1..MAX_LOG_LINES, so a zero or negative count cannot reach tail
+    lines = min(max(int(args.get('lines', 200)), 1), MAX_LOG_LINES)
+    return {'path': path, 'level': level, 'pattern': pattern, 'lines': lines}
+
 @app.route('/logs')
 def logs():
-    with open('logs/trading_app.log', 'r') as f:
-        logs = f.readlines()
-    return render_template('logs.html', logs=logs)
+    try:
+        query = log_query(request.args)
+        if query is None:
+            return render_template('logs.html', logs=[], entries=[], cursor=None, files=available_logs(), args=request.args)
+        entries, cursor = tail(query['path'], query['lines'], request.args.get('before'), query['level'], query['pattern'])
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    return render_template('logs.html', logs=[entry['text'] for entry in entries], entries=entries, cursor=cursor,
+                           files=available_logs(), args=request.args)
+
+@app.route('/logs/lines')
+def log_lines():
+    # Newest `lines` entries before the `before` cursor; pass the returned cursor back to page further into the past
+    try:
+        query = log_query(request.args)
+        if query is None:
+            return jsonify({"error": "Log file not found"}), 404
+        entries, cursor = tail(query['path'], query['lines'], request.args.get('before'), query['level'], query['pattern'])
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'entries': entries, 'cursor': cursor}), 200
+
+@app.route('/logs/stream')
+def log_stream():
+    # Server-Sent Events: each new line is an event whose id is its byte offset, so EventSource resumes after a reconnect
+    try:
+        query = log_query(request.args)
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    if query is None:
+        return jsonify({"error": "Log file not found"}), 404
+    offset = request.headers.get('Last-Event-ID') or request.args.get('offset')
+    offset = int(offset) if offset and offset.isdigit() else None
+
+    def events():
+        for item in follow(query['path'], offset, query['level'], query['pattern']):
+            if item is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {item[0]}\ndata: {item[1]}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def main_trading_logic():
-    account_state = get_account_state()
-    if account_state is None:
+    # Timed as the trading_cycle stage; with the profiler enabled the slowest cycle's stacks are written to logs/
+    with profiler.cycle():
+        run_trading_cycle()
+
+def run_trading_cycle():
+    # Served from memory unless config.json changed, so /configure edits apply from the next cycle
+    config = load_config()
+    currency_pairs = config['currency_pairs']
+
+    # Account, positions and quotes for the whole cycle, read on the MT5 thread
+    snapshot = order_executor.call(take_snapshot, currency_pairs)
+    if snapshot.account is None:
         logger.error("Failed to retrieve account state.")
         return
 
-    execute_trades(models, currency_pairs, account_state)
+    models.add_pairs(currency_pairs)
+    xgb_models.add_pairs(currency_pairs)
+    execute_trades(models, xgb_models, currency_pairs, snapshot, order_executor,
+                   fetch_workers=config.get('fetch_workers', 8), trade_volume=config.get('trade_volume', 0.01))
 
 def close_trades_logic():
-    close_open_trades()
+    order_executor.call(close_open_trades)
 
-def main():
-    schedule.every(60).seconds.do(main_trading_logic)
-    schedule.every(60).seconds.do(close_trades_logic)
+def refresh_xgb_logic():
+    # Warm-start refits run on their own thread so the trading cycle never waits on them
+    Thread(target=xgb_models.refresh_due, daemon=True).start()
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+def main():
+    schedule_config = config.get('schedule', {})
+    # Entries fire on bar closes of the timeframe the models are fed, offset so the closed bar has been published.
+    # Exits are added first, so at a shared deadline positions are closed before new ones are opened.
+    scheduler.add('exits', close_trades_logic, schedule_config.get('exit_interval', 60))
+    scheduler.add('entries', main_trading_logic, schedule_config.get('entry_timeframe', '1h'),
+                  offset=schedule_config.get('entry_offset', 10), max_lag=schedule_config.get('entry_max_lag', 300))
+    scheduler.add('xgb_refresh', refresh_xgb_logic, config.get('xgb_refresh_check_interval', 900))
+    scheduler.run_forever()
 
 if __name__ == "__main__":
     flask_thread = Thread(target=app.run, kwargs={'host': '127.0.0.1', 'port': 5000})
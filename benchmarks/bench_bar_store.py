@@ -0,0 +1,54 @@
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from utils.bar_store import BarStore, import_csv
+
+SOURCE_DIR = 'data/historical_data'
+
+def timed(fn, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def synthetic_csv(path, rows):
+    index = pd.date_range('2015-01-01', periods=rows, freq='min')
+    close = 1.1 + np.cumsum(np.random.default_rng(0).normal(0, 1e-4, rows))
+    df = pd.DataFrame({'Open': close, 'High': close + 1e-4, 'Low': close - 1e-4, 'Close': close}, index=index)
+    df.iloc[::-1].to_csv(path)
+
+def bench(store_root, pairs, csv_paths, timeframe, repeat):
+    cold_store = BarStore(store_root)
+    results = {
+        'read_csv cold': timed(lambda: [pd.read_csv(path) for path in csv_paths]),
+        'bar_store cold': timed(lambda: [cold_store.read_frame(pair, timeframe) for pair in pairs]),
+    }
+    warm_store = BarStore(store_root)
+    [warm_store.read_frame(pair, timeframe) for pair in pairs]
+    results['read_csv warm'] = timed(lambda: [pd.read_csv(path) for path in csv_paths], repeat)
+    results['bar_store warm'] = timed(lambda: [warm_store.read_frame(pair, timeframe) for pair in pairs], repeat)
+    results['bar_store range'] = timed(lambda: [warm_store.read(pair, timeframe, start='2016-01-01', end='2016-02-01') for pair in pairs], repeat)
+    return results
+
+def report(title, results):
+    print(title)
+    for name, seconds in results.items():
+        print(f"  {name:<16} {seconds * 1000:10.3f} ms")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+        files = sorted(f for f in os.listdir(SOURCE_DIR) if f.endswith('.csv'))
+        pairs = [f[:-4] for f in files]
+        for pair, file_name in zip(pairs, files):
+            import_csv(store, pair, os.path.join(SOURCE_DIR, file_name))
+        report(f"{len(pairs)} historical CSVs", bench(root, pairs, [os.path.join(SOURCE_DIR, f) for f in files], '1d', 20))
+
+        csv_path = os.path.join(root, 'SYNTH.csv')
+        synthetic_csv(csv_path, 1_000_000)
+        import_csv(store, 'SYNTH', csv_path, '1m')
+        report("1,000,000 synthetic M1 bars", bench(root, ['SYNTH'], [csv_path], '1m', 5))
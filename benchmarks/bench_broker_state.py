@@ -0,0 +1,67 @@
+import time
+from utils import fake_mt5
+
+mt5 = fake_mt5.install()
+
+from utils.trading import take_snapshot, place_order, close_order, symbol_cache
+
+# Seconds slept per terminal call, standing in for the IPC round trip to a local terminal
+LATENCIES = [0.0, 0.0002]
+PAIR_COUNTS = [3, 26]
+
+def quotes(count):
+    return {f'SYM{i:03d}': (1.0 + i / 100, 5) for i in range(count)}
+
+def per_call_cycle(pairs):
+    # The calls the trading loop made before the snapshot: account_info, then per order positions_get for the
+    # open-trade count, symbol_info and symbol_info_tick; closing read each position and its tick again
+    mt5.account_info()
+    for pair in pairs:
+        len(mt5.positions_get())
+        point = mt5.symbol_info(pair).point
+        price = mt5.symbol_info_tick(pair).ask
+        mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": pair, "volume": 0.01, "type": mt5.ORDER_TYPE_BUY,
+                        "price": price, "sl": price - 100 * point, "tp": price + 100 * point, "deviation": 10})
+    for position in mt5.positions_get():
+        position = mt5.positions_get(ticket=position.ticket)[0]
+        price = mt5.symbol_info_tick(position.symbol).bid
+        mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": position.symbol, "volume": position.volume,
+                        "type": mt5.ORDER_TYPE_SELL, "position": position.ticket, "price": price, "deviation": 10})
+
+def snapshot_cycle(pairs):
+    snapshot = take_snapshot(pairs)
+    snapshot.refresh_ticks()
+    for pair in pairs:
+        len(snapshot.open_trades())
+        place_order(pair, 'buy', 0.01, snapshot)
+    snapshot = take_snapshot([])
+    for trade in snapshot.open_trades():
+        close_order(trade['order_id'], snapshot)
+
+def run(cycle, pairs, latency, repeat=5):
+    times = []
+    calls = 0
+    for _ in range(repeat):
+        terminal = fake_mt5.reset(quotes=quotes(len(pairs)), latency=latency)
+        mt5.initialize()
+        symbol_cache.clear()
+        # The symbol cache lives as long as the process, so it is warmed outside the timed cycle
+        if cycle is snapshot_cycle:
+            take_snapshot(pairs)
+        terminal.calls.clear()
+        start = time.perf_counter()
+        cycle(pairs)
+        times.append(time.perf_counter() - start)
+        calls = sum(terminal.calls.values())
+        assert not terminal.positions
+    return min(times), calls
+
+if __name__ == "__main__":
+    print("One trading cycle: an order on every pair, then every position closed")
+    for latency in LATENCIES:
+        for count in PAIR_COUNTS:
+            pairs = list(quotes(count))
+            print(f"{count} pairs, {latency * 1e6:.0f} us per terminal call")
+            for name, cycle in (('per-call', per_call_cycle), ('snapshot', snapshot_cycle)):
+                seconds, calls = run(cycle, pairs, latency)
+                print(f"  {name:<10} {calls:5d} calls {seconds * 1000:9.3f} ms")
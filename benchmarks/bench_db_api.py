@@ -0,0 +1,89 @@
+import os
+import time
+import psycopg2
+from db_api import DB_CONFIG
+from utils.db_pool import ConnectionPool, WriteBehindBuffer, insert_trades, trade_row
+
+# Point BENCH_DB_DSN at a scratch database, e.g. "dbname=postgres host=localhost"; defaults to db_api.DB_CONFIG
+DSN = os.environ.get('BENCH_DB_DSN')
+TABLE = 'trades_bench'
+TRADE = {'pair': 'EURUSD', 'volume': 0.01, 'price': 1.08345, 'action': 'BUY'}
+
+def connect():
+    return psycopg2.connect(DSN) if DSN else psycopg2.connect(**DB_CONFIG)
+
+def db_config():
+    return {'dsn': DSN} if DSN else DB_CONFIG
+
+def reset_table():
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} (pair VARCHAR(10), volume DOUBLE PRECISION, price DOUBLE PRECISION, action VARCHAR(10), timestamp TIMESTAMP)")
+    conn.commit()
+    conn.close()
+
+def count_rows():
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {TABLE}")
+        count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+def connect_per_trade(n):
+    # What every /log_trade call used to do
+    for _ in range(n):
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute(f"INSERT INTO {TABLE} (pair, volume, price, action, timestamp) VALUES (%s, %s, %s, %s, NOW())",
+                       (TRADE['pair'], TRADE['volume'], TRADE['price'], TRADE['action']))
+        conn.commit()
+        conn.close()
+
+def pooled_per_trade(pool, n):
+    for _ in range(n):
+        with pool.connection() as conn:
+            insert_trades(conn, [trade_row(TRADE)], TABLE)
+
+def pooled_bulk(pool, n, batch_size):
+    for start in range(0, n, batch_size):
+        with pool.connection() as conn:
+            insert_trades(conn, [trade_row(TRADE) for _ in range(min(batch_size, n - start))], TABLE)
+
+def write_behind(pool, n):
+    buffer = WriteBehindBuffer(pool, flush_size=1000, flush_interval=0.1, table=TABLE)
+    start = time.perf_counter()
+    for _ in range(n):
+        buffer.add([trade_row(TRADE)])
+    enqueue_seconds = time.perf_counter() - start
+    buffer.close()
+    return enqueue_seconds, time.perf_counter() - start
+
+def report(name, n, seconds):
+    print(f"  {name:<28} {n:>7} trades {seconds:8.3f} s {n / seconds:12.0f} trades/s")
+
+if __name__ == "__main__":
+    reset_table()
+    pool = ConnectionPool(db_config(), maxconn=4)
+    print(f"Inserting into {TABLE}")
+
+    start = time.perf_counter()
+    connect_per_trade(500)
+    report('connect per trade (before)', 500, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pooled_per_trade(pool, 2000)
+    report('pooled, one per request', 2000, time.perf_counter() - start)
+
+    for batch_size in [100, 1000, 10000]:
+        start = time.perf_counter()
+        pooled_bulk(pool, 50000, batch_size)
+        report(f'pooled /log_trades x{batch_size}', 50000, time.perf_counter() - start)
+
+    enqueue_seconds, total_seconds = write_behind(pool, 50000)
+    report('write-behind, caller side', 50000, enqueue_seconds)
+    report('write-behind, until flushed', 50000, total_seconds)
+
+    print(f"{count_rows()} rows written, pool {pool.stats()}")
+    pool.closeall()
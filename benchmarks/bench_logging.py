@@ -0,0 +1,69 @@
+import os
+import time
+import queue
+import logging
+import tempfile
+from logging.handlers import QueueListener
+from utils.logger import LOG_FORMAT, LightQueueHandler, RepeatFilter
+
+CALLS = 20000
+DISK_STALL = 0.0005
+
+class SlowFileHandler(logging.FileHandler):
+    # Stands in for a disk or network share that stalls on every write
+    def emit(self, record):
+        time.sleep(DISK_STALL)
+        super().emit(record)
+
+def per_call(logger, message, calls=CALLS):
+    start = time.perf_counter()
+    for i in range(calls):
+        logger.error(message(i))
+    return (time.perf_counter() - start) / calls
+
+def file_handler(path, handler_class):
+    handler = handler_class(path)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+def direct_logger(name, path, handler_class=logging.FileHandler):
+    # What setup_logging used to do: the file is written on the calling thread
+    logger = logging.getLogger(f'bench.{name}')
+    logger.addHandler(file_handler(path, handler_class))
+    logger.propagate = False
+    return logger, None
+
+def queued_logger(name, path, handler_class=logging.FileHandler, repeat_interval=0):
+    # The setup_logging pipeline: records go on a queue, a listener thread writes them
+    log_queue = queue.SimpleQueue()
+    queue_handler = LightQueueHandler(log_queue)
+    queue_handler.addFilter(RepeatFilter(repeat_interval))
+    listener = QueueListener(log_queue, file_handler(path, handler_class))
+    listener.start()
+    logger = logging.getLogger(f'bench.{name}')
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    return logger, listener
+
+if __name__ == "__main__":
+    unique = lambda i: f"Error trading EURUSD: order {i} rejected"
+    repeated = lambda i: "Failed to get open positions, error code = (-10001, 'IPC send failed')"
+    cases = [
+        ('direct, unique', direct_logger, {}, unique, CALLS),
+        ('queued, unique', queued_logger, {}, unique, CALLS),
+        ('direct, repeated', direct_logger, {}, repeated, CALLS),
+        ('queued + repeat filter', queued_logger, {'repeat_interval': 300}, repeated, CALLS),
+        ('direct, stalling disk', direct_logger, {'handler_class': SlowFileHandler}, unique, 2000),
+        ('queued, stalling disk', queued_logger, {'handler_class': SlowFileHandler}, unique, 2000),
+    ]
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Per-call cost of logger.error on the calling thread ({DISK_STALL * 1000:.1f} ms per write when stalling)")
+        for number, (name, make_logger, kwargs, message, calls) in enumerate(cases):
+            path = os.path.join(root, f'{number}.log')
+            logger, listener = make_logger(str(number), path, **kwargs)
+            seconds = per_call(logger, message, calls)
+            start = time.perf_counter()
+            if listener is not None:
+                listener.stop()
+            drain = time.perf_counter() - start
+            print(f"  {name:<24} {seconds * 1e6:9.2f} us   {os.path.getsize(path):>9} bytes written, {drain:.3f}s to drain")
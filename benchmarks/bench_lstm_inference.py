@@ -0,0 +1,35 @@
+import os
+import time
+import tempfile
+import numpy as np
+from keras.models import load_model
+from utils.lstm_numpy import NumpyLSTMModel, export_model
+
+MODEL_DIR = 'models'
+
+def per_call(fn, calls):
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+if __name__ == "__main__":
+    paths = sorted(os.path.join(MODEL_DIR, f) for f in os.listdir(MODEL_DIR) if f.startswith('lstm_model_') and f.endswith('.keras'))
+    keras_models = [load_model(path) for path in paths]
+    with tempfile.TemporaryDirectory() as root:
+        numpy_models = [export_model(model, os.path.join(root, f'{i}.npz')) for i, model in enumerate(keras_models)]
+    window = np.random.default_rng(0).uniform(0.5, 2.0, size=(1,) + tuple(keras_models[0].input_shape[1:]))
+    windows = np.stack([window] * len(numpy_models))
+    stacked = NumpyLSTMModel.stack(numpy_models)
+
+    difference = max(float(np.max(np.abs(k.predict(window, verbose=0) - n.predict(window)))) for k, n in zip(keras_models, numpy_models))
+    results = {
+        'keras predict': per_call(lambda: keras_models[0].predict(window, verbose=0), 200),
+        'keras __call__': per_call(lambda: keras_models[0](window, training=False), 200),
+        'numpy predict': per_call(lambda: numpy_models[0].predict(window), 2000),
+        f'numpy {len(numpy_models)} stacked': per_call(lambda: stacked.predict_group(windows), 500),
+    }
+    print(f"{len(paths)} models, max absolute difference {difference:.2e}")
+    for name, seconds in results.items():
+        print(f"  {name:<18} {seconds * 1e6:10.1f} us/call")
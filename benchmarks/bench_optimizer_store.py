@@ -0,0 +1,75 @@
+import os
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import xml.etree.ElementTree as ET
+from utils.optimizer_store import OptimizerStore, report_rows
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD', 'USDCHF', 'NZDUSD', 'EURGBP', 'EURJPY', 'GBPJPY',
+           'AUDJPY', 'CHFJPY', 'EURAUD', 'EURCAD', 'EURNZD', 'GBPAUD', 'GBPCAD', 'GBPNZD', 'AUDCAD', 'AUDCHF']
+HEADER = ['Symbol', 'Pass', 'Result', 'Profit', 'Expected Payoff', 'Profit Factor', 'Recovery Factor', 'Sharpe Ratio',
+          'Custom', 'Equity DD %', 'Trades', 'StopLossATR', 'TakeProfitATR', 'LookBack']
+
+def timed(fn, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def synthetic_report(path, passes, seed=0):
+    # Same layout as the tester's ReportOptimizer-*.xml: a header row, then one row per pass
+    rng = np.random.default_rng(seed)
+    cell = '<Cell><Data ss:Type="{}">{}</Data></Cell>'
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet" '
+                'xmlns:ss="urn:schemas-microsoft-com:office:spreadsheet">\n<Worksheet ss:Name="Tester Optimizator Results">\n<Table>\n')
+        f.write('<Row>' + ''.join(cell.format('String', name) for name in HEADER) + '</Row>\n')
+        for number in range(passes):
+            profit = rng.normal(500, 1500)
+            values = [10000 + profit, profit, profit / 150, rng.uniform(0.5, 2.0), rng.uniform(0, 3), rng.uniform(-1, 1), 0,
+                      rng.uniform(5, 80), rng.integers(20, 400), rng.choice([1.0, 1.5, 2.0, 3.0]), rng.choice([1.5, 2.0, 3.0]), rng.choice([10, 14, 20])]
+            row = cell.format('String', SYMBOLS[number % len(SYMBOLS)]) + cell.format('Number', number)
+            row += ''.join(cell.format('Number', f'{value:.6f}') for value in values)
+            f.write(f'<Row>{row}</Row>\n')
+        f.write('</Table>\n</Worksheet>\n</Workbook>\n')
+
+def dom_rows(path):
+    # What convert_xml_to_json.py used to do: the whole document in memory, then every row
+    namespace = {'ss': 'urn:schemas-microsoft-com:office:spreadsheet'}
+    rows = ET.parse(path).getroot().find('.//ss:Table', namespace).findall('ss:Row', namespace)
+    return [[cell.find('ss:Data', namespace).text for cell in row.findall('ss:Cell', namespace)] for row in rows]
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def bench(root, passes):
+    path = os.path.join(root, f'ReportOptimizer-{passes}.xml')
+    synthetic_report(path, passes)
+    print(f"{passes} passes, {os.path.getsize(path) / 1e6:.1f} MB report")
+    print(f"  parse peak memory: ET.parse {peak_memory(lambda: dom_rows(path)) / 1e6:8.1f} MB, "
+          f"streaming {peak_memory(lambda: sum(1 for _ in report_rows(path))) / 1e6:8.1f} MB")
+
+    store = OptimizerStore(os.path.join(root, f'optimizer-{passes}.db'))
+    print(f"  ingest                                  {timed(lambda: store.ingest([path], force=True)):10.3f} s")
+    queries = {
+        'PF >= 1.3 and DD <= 40, top 100': lambda: store.query(min_profit_factor=1.3, max_drawdown=40, limit=100),
+        'PF >= 1.3 and DD <= 40, all': lambda: store.query(min_profit_factor=1.3, max_drawdown=40),
+        'top 10 by Sharpe for one symbol': lambda: store.query(symbols=['EURUSD'], order_by='sharpe_ratio', limit=10),
+        'best pass per symbol, uncached': lambda: store.query('best_passes'),
+        'best pass per symbol, cached': lambda: store.best()[1],
+    }
+    for name, query in queries.items():
+        print(f"  {name:<40} {timed(query, 20) * 1000:10.3f} ms ({len(query())} rows)")
+    store.close()
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        for passes in [10000, 100000]:
+            bench(root, passes)
@@ -0,0 +1,109 @@
+import sys
+import time
+import types
+import numpy as np
+import pandas as pd
+from utils import fake_mt5
+from benchmarks.synthetic import synthetic_bars
+
+# Offline stand-ins for yfinance, NewsAPI and MetaTrader5. install() has to run before utils.data_fetcher or
+# utils.trading is imported, since those import yfinance and MetaTrader5 at module level.
+
+WORDS = ['rally', 'slump', 'steady', 'surge', 'weak', 'strong', 'cautious', 'record', 'losses', 'gains', 'rate', 'cut',
+         'hike', 'inflation', 'growth', 'fears', 'hopes', 'central', 'bank', 'outlook', 'jobs', 'data', 'beats', 'misses']
+
+# yfinance period strings the stub understands; 'max' returns the whole series
+PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827, 'max': None}
+
+class YFinanceStub:
+    # download() and Ticker().history() as the app calls them: period or start, one "XXXYYY=X" ticker, bars up to the
+    # end of the synthetic series
+    def __init__(self, history_bars=1000, latency=0.0, seed=0):
+        self.history_bars = history_bars
+        self.latency = latency
+        self.seed = seed
+        self.series = {}
+        self.calls = 0
+
+    def bars(self, pair, interval):
+        key = (pair, interval)
+        if key not in self.series:
+            self.series[key] = synthetic_bars(pair, self.history_bars, interval, self.seed)
+        return self.series[key]
+
+    def download(self, tickers, period=None, interval='1d', start=None, end=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        data = self.bars(tickers.replace('=X', ''), interval)
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        elif PERIOD_DAYS.get(period):
+            data = data[data.index > data.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        data = data.copy()
+        data.insert(4, 'Adj Close', data['Close'])
+        return data
+
+    def history(self, ticker, period=None, interval='1d', start=None, end=None, **kwargs):
+        data = self.download(ticker, period, interval, start, end).drop(columns='Adj Close')
+        data['Dividends'] = 0.0
+        data['Stock Splits'] = 0.0
+        return data
+
+    def module(self):
+        module = types.ModuleType('yfinance')
+        module.download = self.download
+        module.Ticker = lambda ticker: types.SimpleNamespace(history=lambda **kwargs: self.history(ticker, **kwargs))
+        return module
+
+class NewsAPIResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+class NewsAPISession:
+    # Replaces SentimentCache.session: deterministic headlines per query, a fresh set every `rotate` calls
+    def __init__(self, headlines=20, rotate=1, latency=0.0, seed=0):
+        self.headlines = headlines
+        self.rotate = rotate
+        self.latency = latency
+        self.seed = seed
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        query = (params or {}).get('q', '')
+        rng = np.random.default_rng([self.seed, sum(map(ord, query)), self.calls // self.rotate])
+        titles = [f"{query} " + ' '.join(rng.choice(WORDS, 6)) for _ in range(self.headlines)]
+        return NewsAPIResponse({'status': 'ok', 'articles': [{'title': title} for title in titles]})
+
+def install(yfinance=None):
+    # yfinance and MetaTrader5 fakes go into sys.modules; NewsAPI is swapped per SentimentCache with install_newsapi
+    yfinance = yfinance or YFinanceStub()
+    sys.modules['yfinance'] = yfinance.module()
+    fake_mt5.install()
+    return yfinance
+
+def install_newsapi(sentiment_cache, session=None):
+    sentiment_cache.session = session or NewsAPISession()
+    return sentiment_cache.session
+
+def install_terminal(pairs, yfinance, interval='1h', latency=0.0):
+    # A fresh MetaTrader5 fake quoting every pair at the last close of its synthetic series
+    quotes = {}
+    for pair in pairs:
+        close = float(yfinance.bars(pair, interval)['Close'].iloc[-1])
+        quotes[pair] = (close, 3 if pair.endswith('JPY') else 5)
+    terminal = fake_mt5.reset(quotes=quotes, latency=latency, balance=1000000.0)
+    fake_mt5.initialize()
+    return terminal
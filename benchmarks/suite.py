@@ -0,0 +1,353 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from benchmarks import stubs
+from benchmarks.synthetic import SIZES, synthetic_pairs, synthetic_bars
+
+# Offline benchmark suite: python -m benchmarks.suite --size small [--compare benchmarks/baseline.json]
+# yfinance, NewsAPI and MetaTrader5 are replaced by the stubs in benchmarks/stubs.py, so every number is measured on the
+# same synthetic data with no network or terminal involved. db_api runs only when BENCH_DB_DSN names a scratch
+# database; its tables are created in the bwtrade_bench schema and dropped afterwards.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+yfinance = stubs.install()
+
+from utils.bar_store import BarStore
+from utils.indicators import compute_indicators
+from utils.lstm_numpy import NumpyLSTMModel
+from utils.order_executor import OrderExecutor
+from utils.xgb_store import XGBModelStore, create_xgb_dataset, fit_xgboost_model
+from utils import data_fetcher, trading
+
+RESULTS_DIR = 'benchmarks/results'
+WINDOWS = [100, 1000, 10000, 100000, 1000000]
+PREDICT_REQUESTS = {'tiny': 300, 'small': 2000, 'medium': 5000, 'large': 10000}
+PREDICT_CLIENTS = [1, 4, 16]
+TRAINING_ROWS = 20000
+DB_SCHEMA = 'bwtrade_bench'
+DB_BATCH = 1000
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+class Results:
+    def __init__(self):
+        self.results = {}
+        self.skipped = {}
+
+    def add(self, name, value, unit, better='lower'):
+        self.results[name] = {'value': float(f'{value:.6g}'), 'unit': unit, 'better': better}
+        print(f"  {name:<44} {value:14.6g} {unit}")
+
+    def skip(self, benchmark, reason):
+        self.skipped[benchmark] = reason
+        print(f"  skipped: {reason}")
+
+def random_lstm(look_back, features, units=50, seed=0):
+    # Same layout as the trained models (LSTM 50 -> LSTM 50 -> Dense 1), with random weights
+    rng = np.random.default_rng(seed)
+    specs = [
+        {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': True},
+        {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': False},
+        {'type': 'Dense', 'activation': 'linear'},
+    ]
+    params = []
+    for inputs in [features, units]:
+        params.append({
+            'kernel': rng.normal(0, 0.1, (1, inputs, 4 * units)).astype(np.float32),
+            'recurrent_kernel': rng.normal(0, 0.1, (1, units, 4 * units)).astype(np.float32),
+            'bias': np.zeros((1, 4 * units), dtype=np.float32),
+        })
+    params.append({'kernel': rng.normal(0, 0.1, (1, units, 1)).astype(np.float32), 'bias': np.zeros((1, 1), dtype=np.float32)})
+    return NumpyLSTMModel((look_back, features), specs, params)
+
+def bench_execute_trades(size, repeat, results):
+    # One full cycle: bar fetch and indicators, sentiment, batched LSTM and XGBoost inference, orders to the terminal.
+    # Orders are not spaced (order_interval 0) so the cycle measures the code rather than the rate limit.
+    pairs = synthetic_pairs(SIZES[size]['pairs'])
+    with tempfile.TemporaryDirectory() as root:
+        data_fetcher.bar_store = BarStore(os.path.join(root, 'bars'))
+        data_fetcher.indicator_cache.reset()
+        stubs.install_newsapi(data_fetcher.sentiment_cache)
+        # Input layout of the trained models: 10 closes, one feature
+        models = {pair: random_lstm(10, 1, seed=i) for i, pair in enumerate(pairs)}
+        xgb_models = XGBModelStore(pairs, model_dir=os.path.join(root, 'models'))
+        for pair in pairs:
+            history = yfinance.bars(pair, '1h')
+            xgb_models.train(pair, history.join(compute_indicators(history)), n_estimators=20)
+        terminal = stubs.install_terminal(pairs, yfinance)
+        executor = OrderExecutor(0)
+
+        def cycle():
+            terminal.positions.clear()
+            snapshot = trading.take_snapshot(pairs)
+            return trading.execute_trades(models, xgb_models, pairs, snapshot, executor)
+
+        start = time.perf_counter()
+        cold = cycle()
+        results.add(f'execute_trades cold, {len(pairs)} pairs', time.perf_counter() - start, 's')
+        # A cycle where inference fails for every pair places nothing and would time the wrong path
+        assert cold['orders'] == len(pairs), f"only {cold['orders']} of {len(pairs)} pairs were traded"
+        warm = [cycle() for _ in range(repeat)]
+        best = min(warm, key=lambda stats: stats['total'])
+        for stage in ['total', 'fetch', 'inference', 'execution']:
+            results.add(f'execute_trades warm {stage}, {len(pairs)} pairs', best[stage], 's')
+        executor.shutdown()
+
+def bench_indicators(size, repeat, results):
+    # Full TA-Lib recompute over the window, against the incremental per-pair path after one new bar
+    data = synthetic_bars('EURUSD', SIZES[size]['bars'])
+    for n in [n for n in WINDOWS if n + repeat < len(data)]:
+        results.add(f'get_technical_indicators full, {n} bars',
+                    best_of(lambda: data_fetcher.get_technical_indicators(data.iloc[-n:].copy()), repeat), 's')
+        data_fetcher.indicator_cache.reset('BENCH')
+        base = len(data) - n - repeat - 1
+        data_fetcher.get_technical_indicators(data.iloc[base:base + n].copy(), 'BENCH')
+        times = []
+        for i in range(1, repeat + 1):
+            window = data.iloc[base + i:base + i + n].copy()
+            start = time.perf_counter()
+            data_fetcher.get_technical_indicators(window, 'BENCH')
+            times.append(time.perf_counter() - start)
+        results.add(f'get_technical_indicators incremental, {n} bars', min(times), 's')
+
+def bench_predict_route(size, repeat, results):
+    # /predict over HTTP on the threaded development server, with 1..16 concurrent keep-alive clients
+    import requests
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/predict'
+    pair = app.currency_pairs[0]
+    window = np.random.default_rng(0).uniform(0.5, 2.0, 10)
+    payload = {'pair': pair, 'data': [[float(x)] for x in window]}
+    requests.post(url, json=payload).raise_for_status()
+    total = PREDICT_REQUESTS[size]
+
+    for clients in PREDICT_CLIENTS:
+        latencies = []
+        lock = threading.Lock()
+
+        def client(count):
+            session = requests.Session()
+            own = []
+            for _ in range(count):
+                start = time.perf_counter()
+                session.post(url, json=payload).raise_for_status()
+                own.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(own)
+
+        threads = [threading.Thread(target=client, args=(total // clients,)) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        results.add(f'/predict throughput, {clients} clients', len(latencies) / seconds, 'req/s', 'higher')
+        results.add(f'/predict p99 latency, {clients} clients', float(np.percentile(latencies, 99)) * 1000, 'ms')
+    server.shutdown()
+    app.order_executor.shutdown()
+
+def bench_training(size, repeat, results):
+    from train_models import create_dataset
+
+    close = synthetic_bars('EURUSD', SIZES[size]['bars'])['Close'].to_numpy().reshape(-1, 1)
+    seconds = best_of(lambda: create_dataset(close, 10), repeat)
+    results.add(f'create_dataset, {len(close)} bars', len(close) / seconds, 'windows/s', 'higher')
+
+    hourly = synthetic_bars('EURUSD', min(SIZES[size]['bars'], TRAINING_ROWS), '1h')
+    data = hourly.join(compute_indicators(hourly))
+    X, y, _ = create_xgb_dataset(data)
+    seconds = best_of(lambda: fit_xgboost_model(X, y, n_estimators=50), repeat)
+    results.add(f'XGBoost fit, {len(X)} rows x 50 trees', len(X) / seconds, 'rows/s', 'higher')
+
+    try:
+        from keras.models import Sequential
+        from keras.layers import Input, LSTM, Dense
+    except ImportError as e:
+        results.skip('lstm_training', f"LSTM training needs keras: {e}")
+        return
+    X, Y = create_dataset(close[:TRAINING_ROWS + 10], 10)
+    X = np.ascontiguousarray(X)[..., np.newaxis]
+    model = Sequential([Input(shape=(10, 1)), LSTM(50, return_sequences=True), LSTM(50), Dense(1)])
+    model.compile(loss='mean_squared_error', optimizer='adam')
+    model.fit(X[:64], Y[:64], epochs=1, batch_size=32, verbose=0)
+    seconds = best_of(lambda: model.fit(X, Y, epochs=1, batch_size=32, verbose=0), 1)
+    results.add(f'LSTM fit, {len(X)} windows x 1 epoch', len(X) / seconds, 'windows/s', 'higher')
+
+def bench_db_api(size, repeat, results):
+    dsn = os.environ.get('BENCH_DB_DSN')
+    if not dsn:
+        results.skip('db_api', "set BENCH_DB_DSN to a scratch database to run the db_api benchmarks")
+        return
+    import psycopg2
+    import db_api
+    from utils.db_pool import ConnectionPool
+
+    db_api.config_cache.stop()
+    db_config = {'dsn': dsn, 'options': f'-c search_path={DB_SCHEMA}'}
+    conn = psycopg2.connect(**db_config)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {DB_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {DB_SCHEMA}")
+        cursor.execute("CREATE TABLE trades (pair VARCHAR(10), volume DOUBLE PRECISION, price DOUBLE PRECISION, action VARCHAR(10), timestamp TIMESTAMP)")
+        with open('migrations/001_trades_keyset_indexes.sql') as f:
+            cursor.execute(f.read())
+    conn.commit()
+
+    db_api.db_pool = ConnectionPool(db_config, maxconn=4)
+    db_api.write_buffer = None
+    client = db_api.app.test_client()
+    pairs = synthetic_pairs(SIZES[size]['pairs'])
+    count = SIZES[size]['trades']
+    rng = np.random.default_rng(0)
+    first = datetime(2024, 1, 1)
+    batches = []
+    for start in range(0, count, DB_BATCH):
+        n = min(DB_BATCH, count - start)
+        batches.append([{'pair': pairs[i % len(pairs)], 'volume': 0.01, 'price': float(price), 'action': 'BUY' if i % 2 else 'SELL',
+                         'timestamp': (first + timedelta(seconds=i)).isoformat()}
+                        for i, price in zip(range(start, start + n), rng.uniform(0.5, 2.0, n))])
+    try:
+        start = time.perf_counter()
+        for batch in batches:
+            response = client.post('/log_trades', json={'trades': batch})
+            assert response.status_code == 200, response.data
+        results.add(f'/log_trades insert, batches of {DB_BATCH}', count / (time.perf_counter() - start), 'trades/s', 'higher')
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE trades")
+        conn.commit()
+
+        def pages():
+            rows = 0
+            cursor = None
+            while True:
+                page = client.get('/fetch_trades', query_string={'limit': 10000, **({'after': cursor} if cursor else {})}).json
+                rows += len(page['trades'])
+                cursor = page['next']
+                if cursor is None:
+                    return rows
+
+        results.add('/fetch_trades keyset pages of 10000', count / best_of(pages, repeat), 'rows/s', 'higher')
+
+        def stream():
+            response = client.get('/fetch_trades', query_string={'format': 'ndjson'})
+            assert response.data.count(b'\n') == count
+            response.close()
+
+        results.add('/fetch_trades ndjson stream', count / best_of(stream, repeat), 'rows/s', 'higher')
+    finally:
+        db_api.db_pool.closeall()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {DB_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+BENCHMARKS = {
+    'execute_trades': bench_execute_trades,
+    'indicators': bench_indicators,
+    'predict_route': bench_predict_route,
+    'training': bench_training,
+    'db_api': bench_db_api,
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, baseline, threshold):
+    # A metric regresses when it is worse than the baseline by more than threshold (0.15 = 15%)
+    if baseline['meta'].get('size') != current['meta']['size']:
+        print(f"Warning: baseline was run at size {baseline['meta'].get('size')}, this run at {current['meta']['size']}")
+    regressions = []
+    print(f"\n{'metric':<52} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['value'] or not result['value']:
+            continue
+        worse = result['value'] / base['value'] if result['better'] == 'lower' else base['value'] / result['value']
+        flag = ''
+        if worse > 1 + threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif worse < 1 / (1 + threshold):
+            flag = 'improved'
+        change = (result['value'] / base['value'] - 1) * 100
+        print(f"{name:<52} {base['value']:12.6g} {result['value']:12.6g} {change:+7.1f}% {flag}")
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"Not measured in this run: {', '.join(missing)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks on synthetic data with stubbed yfinance, NewsAPI and MetaTrader5")
+    parser.add_argument('--size', choices=list(SIZES), default='tiny')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="benchmarks to run, all by default")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument('--output', help=f"results file, {RESULTS_DIR}/<size>-<time>.json by default")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to compare against; exits 1 on a regression")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed slowdown before a metric is flagged")
+    parser.add_argument('--save-baseline', metavar='PATH', help="also write the results here, for later --compare runs")
+    args = parser.parse_args()
+
+    current = {
+        'meta': {
+            'size': args.size,
+            'repeat': args.repeat,
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': {},
+        'skipped': {},
+    }
+    results = Results()
+    for name in args.only or list(BENCHMARKS):
+        print(f"{name} ({args.size})")
+        try:
+            BENCHMARKS[name](args.size, args.repeat, results)
+        except Exception as e:
+            results.skip(name, f"failed: {e!r}")
+    current['results'] = results.results
+    current['skipped'] = results.skipped
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.size}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.json")
+    for path in filter(None, [output, args.save_baseline]):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(current, f, indent=4)
+        print(f"Wrote {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
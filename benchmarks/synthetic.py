@@ -0,0 +1,60 @@
+import zlib
+import itertools
+import numpy as np
+import pandas as pd
+from utils.bar_store import INTERVAL_SECONDS
+
+# Deterministic OHLC bars for benchmarks: the same pair, size and seed always give the same frame, so runs on
+# different machines or commits are measured on identical data.
+
+CURRENCIES = ['EUR', 'USD', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'NZD', 'SEK', 'NOK', 'SGD', 'HKD', 'ZAR', 'MXN']
+START = pd.Timestamp('2020-01-06', tz='UTC')
+
+# Benchmark sizes: how many pairs, and how many M1 bars per pair for the per-bar benchmarks
+SIZES = {
+    'tiny': {'pairs': 3, 'bars': 2000, 'trades': 5000},
+    'small': {'pairs': 10, 'bars': 50000, 'trades': 50000},
+    # About one year of M1 bars (260 trading days)
+    'medium': {'pairs': 50, 'bars': 375000, 'trades': 500000},
+    # About four years of M1 bars
+    'large': {'pairs': 50, 'bars': 1500000, 'trades': 2000000},
+}
+
+def synthetic_pairs(count):
+    pairs = [base + quote for base, quote in itertools.permutations(CURRENCIES, 2)]
+    return pairs[:count]
+
+def bar_times(bars, timeframe='1m', end=None):
+    # Weekday bars only, as FX closes over the weekend; with end given the series finishes at the bar before it
+    step = pd.Timedelta(seconds=INTERVAL_SECONDS[timeframe])
+    per_day = max(1, 86400 // INTERVAL_SECONDS[timeframe])
+    span = (bars // per_day + 1) * 7 // 5 + 3
+    if end is None:
+        times = pd.date_range(START, periods=span * per_day, freq=step)
+        return times[times.dayofweek < 5][:bars]
+    end = pd.Timestamp(end).floor(step)
+    times = pd.date_range(end=end - step, periods=span * per_day, freq=step)
+    return times[times.dayofweek < 5][-bars:]
+
+def synthetic_bars(pair, bars, timeframe='1m', seed=0, end=None):
+    rng = np.random.default_rng([seed, zlib.crc32(pair.encode())])
+    times = bar_times(bars, timeframe, end)
+    bars = len(times)
+    start_price = rng.uniform(0.6, 1.8) * (100 if pair.endswith('JPY') else 1)
+    # Random walk in log price, with volatility scaled to the bar length and a slowly varying regime
+    step_vol = 0.0006 * np.sqrt(INTERVAL_SECONDS[timeframe] / 3600)
+    regime = 1 + 0.5 * np.sin(np.linspace(0, 12 * np.pi, bars) + rng.uniform(0, 2 * np.pi))
+    returns = rng.normal(0, step_vol, bars) * regime
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    wick = np.abs(rng.normal(0, step_vol / 2, (2, bars))) * close
+    digits = 3 if pair.endswith('JPY') else 5
+    data = pd.DataFrame({
+        'Open': open_.round(digits),
+        'High': (np.maximum(open_, close) + wick[0]).round(digits),
+        'Low': (np.minimum(open_, close) - wick[1]).round(digits),
+        'Close': close.round(digits),
+        'Volume': rng.integers(50, 5000, bars),
+    }, index=times)
+    data.index.name = 'Datetime'
+    return data
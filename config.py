@@ -1,9 +1,9 @@
-import json
+from utils.config_cache import FileConfigCache
+
+config_cache = FileConfigCache('config.json')
 
 def load_config():
-    with open('config.json', 'r') as f:
-        return json.load(f)
+    return config_cache.snapshot()
 
 def save_config(config):
-    with open('config.json', 'w') as f:
-        json.dump(config, f, indent=4)
+    config_cache.save(config)
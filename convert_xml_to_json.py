@@ -1,29 +1,34 @@
-import xml.etree.ElementTree as ET
+import sys
+import glob
 import json
+from utils.optimizer_store import OptimizerStore, COLUMNS
 
-def xml_to_json(xml_file):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    namespace = {'ss': 'urn:schemas-microsoft-com:office:spreadsheet'}
+# Usage: python convert_xml_to_json.py [ReportOptimizer-*.xml ...]
+# Every pass of the given tester reports (all ReportOptimizer-*.xml here by default) goes into the optimizer store;
+# optimization_data.json is then written from the best pass per symbol for tools that still read the file.
 
-    data = {}
-    rows = root.find('.//ss:Table', namespace).findall('ss:Row', namespace)
-
-    # Extract headers
-    headers = [cell.find('ss:Data', namespace).text for cell in rows[0].findall('ss:Cell', namespace)]
-
-    # Extract data rows
-    for row in rows[1:]:
-        cells = row.findall('ss:Cell', namespace)
-        row_data = {headers[i]: (cells[i].find('ss:Data', namespace).text if i < len(cells) else '') for i in range(len(headers))}
-        symbol = row_data['Symbol']
-        data[symbol] = row_data
+def number_text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
 
+def xml_to_json(xml_files, store):
+    store.ingest(xml_files)
+    _, best = store.best()
+    data = {}
+    for record in best:
+        row = {field: number_text(record[column]) for field, column in COLUMNS.items()}
+        row.update({name: number_text(value) for name, value in record['params'].items()})
+        data[record['symbol']] = row
     return data
 
-xml_file = 'ReportOptimizer-83005574.xml'
-json_data = xml_to_json(xml_file)
+if __name__ == "__main__":
+    xml_files = sys.argv[1:] or sorted(glob.glob('ReportOptimizer-*.xml'))
+    json_data = xml_to_json(xml_files, OptimizerStore())
 
-# Save JSON data to a file
-with open('optimization_data.json', 'w') as json_file:
-    json.dump(json_data, json_file, indent=4)
+    # Save JSON data to a file
+    with open('optimization_data.json', 'w') as json_file:
+        json.dump(json_data, json_file, indent=4)
+    print(f"Wrote {len(json_data)} symbols from {len(xml_files)} reports to optimization_data.json")
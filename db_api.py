@@ -1,6 +1,10 @@
-from flask import Flask, request, jsonify
-import psycopg2
+from flask import Flask, request, jsonify, Response, stream_with_context
 import json
+import uuid
+import base64
+from datetime import datetime
+from utils.db_pool import ConnectionPool, WriteBehindBuffer, insert_trades, trade_row
+from utils.config_cache import DBConfigCache
 
 app = Flask(__name__)
 
@@ -13,19 +17,51 @@ DB_CONFIG = {
     "port": 5432
 }
 
-def connect_db():
-    return psycopg2.connect(**DB_CONFIG)
+# Connections kept open between requests
+POOL_CONFIG = {
+    "minconn": 1,
+    "maxconn": 10,
+    "health_check_interval": 30
+}
+
+# With write-behind enabled, /log_trade and /log_trades queue rows and return before they reach Postgres
+WRITE_BEHIND_CONFIG = {
+    "enabled": False,
+    "flush_size": 500,
+    "flush_interval": 1.0,
+    "max_pending": 100000
+}
+
+db_pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+config_cache = DBConfigCache(db_pool, DB_CONFIG)
+write_buffer = None
+if WRITE_BEHIND_CONFIG["enabled"]:
+    write_buffer = WriteBehindBuffer(db_pool, flush_size=WRITE_BEHIND_CONFIG["flush_size"],
+                                     flush_interval=WRITE_BEHIND_CONFIG["flush_interval"],
+                                     max_pending=WRITE_BEHIND_CONFIG["max_pending"])
+
+# /fetch_trades page sizes and server-side cursor batch size
+MAX_PAGE_SIZE = 10000
+STREAM_BATCH_SIZE = 2000
+TRADE_SELECT = "SELECT pair, volume, price, action, timestamp, id FROM trades"
+
+def store_trades(rows):
+    if write_buffer is not None:
+        write_buffer.add(rows)
+        return "queued"
+    with db_pool.connection() as conn:
+        insert_trades(conn, rows)
+    return "success"
 
 @app.route('/get_config', methods=['GET'])
 def get_config():
+    # Served from memory while the LISTEN connection is up; clients holding the current ETag get a 304
     key = request.args.get('key')
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM config WHERE key = %s", (key,))
-    result = cursor.fetchone()
-    conn.close()
+    result = config_cache.get(key)
     if result:
-        return jsonify({"value": result[0]})
+        response = jsonify({"value": result[0], "version": result[1]})
+        response.set_etag(f"{key}-{result[1]}")
+        return response.make_conditional(request)
     else:
         return jsonify({"error": "Key not found"}), 404
 
@@ -34,44 +70,151 @@ def set_config():
     data = request.json
     key = data['key']
     value = data['value']
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO config (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (key, value))
-    conn.commit()
-    conn.close()
-    return jsonify({"status": "success"})
+    version = config_cache.set(key, value)
+    return jsonify({"status": "success", "version": version})
 
 @app.route('/log_trade', methods=['POST'])
 def log_trade():
     data = request.json
-    pair = data['pair']
-    volume = data['volume']
-    price = data['price']
-    action = data['action']
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO trades (pair, volume, price, action, timestamp) VALUES (%s, %s, %s, %s, NOW())", (pair, volume, price, action))
-    conn.commit()
-    conn.close()
-    return jsonify({"status": "success"})
+    status = store_trades([trade_row(data)])
+    return jsonify({"status": status})
+
+@app.route('/log_trades', methods=['POST'])
+def log_trades():
+    # Accepts {"trades": [...]} or a bare list of the same objects /log_trade takes
+    data = request.json
+    trades = data.get('trades') if isinstance(data, dict) else data
+    if not isinstance(trades, list):
+        return jsonify({"error": "Expected a list of trades"}), 400
+    try:
+        rows = [trade_row(trade) for trade in trades]
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"Invalid trade: {e}"}), 400
+    if not rows:
+        return jsonify({"status": "success", "count": 0})
+    status = store_trades(rows)
+    return jsonify({"status": status, "count": len(rows)})
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row[4].isoformat(), row[5]]).encode()).decode()
+
+def decode_cursor(token):
+    timestamp, trade_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return timestamp, int(trade_id)
+
+def trade_filters(args):
+    # Filters shared by the listing and the summary; pair and action take comma-separated lists
+    clauses = []
+    params = []
+    for column in ['pair', 'action']:
+        if args.get(column):
+            values = args[column].split(',')
+            # A single value is an equality so the (column, timestamp, id) index also supplies the order
+            if len(values) == 1:
+                clauses.append(f"{column} = %s")
+                params.append(values[0])
+            else:
+                clauses.append(f"{column} = ANY(%s)")
+                params.append(values)
+    if args.get('start'):
+        clauses.append("timestamp >= %s")
+        params.append(datetime.fromisoformat(args['start']))
+    if args.get('end'):
+        clauses.append("timestamp < %s")
+        params.append(datetime.fromisoformat(args['end']))
+    return clauses, params
+
+def trade_dict(row):
+    return {
+        "pair": row[0],
+        "volume": row[1],
+        "price": row[2],
+        "action": row[3],
+        "timestamp": row[4],
+        "id": row[5]
+    }
+
+def trade_summary(clauses, params):
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT pair, count(*), sum(volume), avg(price), min(timestamp), max(timestamp) FROM trades{where} GROUP BY pair ORDER BY pair", params)
+        result = cursor.fetchall()
+    summary = {}
+    for row in result:
+        summary[row[0]] = {
+            "count": row[1],
+            "volume": row[2],
+            "avg_price": row[3],
+            "first": row[4],
+            "last": row[5]
+        }
+    return jsonify({"summary": summary})
+
+def stream_trades(sql, params, ndjson):
+    # A named cursor keeps the result set on the server; rows arrive STREAM_BATCH_SIZE at a time
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(name=f"fetch_trades_{uuid.uuid4().hex}")
+        cursor.itersize = STREAM_BATCH_SIZE
+        cursor.execute(sql, params)
+        if ndjson:
+            for row in cursor:
+                yield app.json.dumps(trade_dict(row)) + "\n"
+        else:
+            yield '{"trades": ['
+            separator = ""
+            for row in cursor:
+                yield separator + app.json.dumps(trade_dict(row))
+                separator = ", "
+            yield "]}"
+        cursor.close()
 
 @app.route('/fetch_trades', methods=['GET'])
 def fetch_trades():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM trades")
-    result = cursor.fetchall()
-    conn.close()
-    trades = []
-    for row in result:
-        trades.append({
-            "pair": row[0],
-            "volume": row[1],
-            "price": row[2],
-            "action": row[3],
-            "timestamp": row[4]
-        })
-    return jsonify({"trades": trades})
+    # Without limit every matching trade is streamed; with limit one page is returned plus a cursor for the next
+    if write_buffer is not None:
+        write_buffer.flush()
+    try:
+        clauses, params = trade_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time range: {e}"}), 400
+    if request.args.get('summary') in ('1', 'true'):
+        return trade_summary(clauses, params)
+
+    ndjson = request.args.get('format') == 'ndjson'
+    if request.args.get('after'):
+        try:
+            clauses.append("(timestamp, id) > (%s, %s)")
+            params.extend(decode_cursor(request.args['after']))
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+    sql = TRADE_SELECT + (f" WHERE {' AND '.join(clauses)}" if clauses else "") + " ORDER BY timestamp, id"
+
+    if 'limit' not in request.args:
+        mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+        return Response(stream_with_context(stream_trades(sql, params, ndjson)), mimetype=mimetype)
+
+    try:
+        limit = max(1, min(int(request.args['limit']), MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql + " LIMIT %s", params + [limit])
+        result = cursor.fetchall()
+    next_cursor = encode_cursor(result[-1]) if len(result) == limit else None
+    if ndjson:
+        body = "".join(app.json.dumps(trade_dict(row)) + "\n" for row in result)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return Response(body, mimetype='application/x-ndjson', headers=headers)
+    return jsonify({"trades": [trade_dict(row) for row in result], "next": next_cursor})
+
+@app.route('/db_stats', methods=['GET'])
+def db_stats():
+    stats = {"pool": db_pool.stats(), "config_cache": config_cache.stats()}
+    if write_buffer is not None:
+        stats["write_behind"] = write_buffer.stats()
+    return jsonify(stats)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
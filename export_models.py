@@ -0,0 +1,28 @@
+import os
+import time
+from utils.logger import setup_logging
+from utils.lstm_numpy import export_keras_file, numpy_path
+
+logger = setup_logging('export_models.log')
+
+MODEL_DIR = 'models'
+
+def export_models(model_dir=MODEL_DIR, force=False):
+    exported = 0
+    for file_name in sorted(f for f in os.listdir(model_dir) if f.startswith('lstm_model_') and f.endswith('.keras')):
+        keras_path = os.path.join(model_dir, file_name)
+        path = numpy_path(keras_path)
+        if not force and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(keras_path):
+            continue
+        start = time.perf_counter()
+        try:
+            _, difference = export_keras_file(keras_path, path)
+        except Exception as e:
+            logger.error(f"Error exporting {keras_path}: {e}")
+            continue
+        exported += 1
+        logger.info(f"Exported {keras_path} to {path} in {time.perf_counter() - start:.2f}s (max relative difference {difference:.2e})")
+    return exported
+
+if __name__ == "__main__":
+    print(f"Exported {export_models()} models")
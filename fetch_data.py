@@ -1,16 +1,17 @@
-import yfinance as yf
-import pandas as pd
 import talib
-from textblob import TextBlob
-import requests
-import numpy as np
 from utils.logger import setup_logging
+from utils.bar_store import BarStore
+from utils.data_fetcher import fetch_bars
+from utils.sentiment import SentimentCache
 
 logger = setup_logging('fetch_data.log')
 
+bar_store = BarStore()
+sentiment_cache = SentimentCache('617ca539a455482c9a08f204f7af4d47', ttl=900)
+
 def fetch_market_data(pair):
     try:
-        data = yf.download(pair + "=X", period="1mo", interval="1h")
+        data = fetch_bars(bar_store, pair)
         if data.empty:
             logger.error(f"Error fetching market data for {pair}")
             return None
@@ -30,12 +31,7 @@ def get_technical_indicators(data):
 
 def fetch_sentiment_analysis(pair):
     try:
-        url = f'https://newsapi.org/v2/everything?q={pair}&apiKey=617ca539a455482c9a08f204f7af4d47'
-        response = requests.get(url)
-        articles = response.json().get('articles', [])
-        sentiment_scores = [TextBlob(article['title']).sentiment.polarity for article in articles]
-        avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0
-        return avg_sentiment
+        return sentiment_cache.pair_sentiment(pair)
     except Exception as e:
         logger.error(f"Error fetching sentiment data for {pair}: {e}")
         return 0
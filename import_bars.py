@@ -0,0 +1,19 @@
+import os
+from utils.logger import setup_logging
+from utils.bar_store import BarStore, import_csv
+
+logger = setup_logging('import_bars.log')
+
+def import_historical_data(store, source_dir='data/historical_data', timeframe='1d'):
+    for file_name in sorted(os.listdir(source_dir)):
+        if not file_name.endswith('.csv'):
+            continue
+        pair = file_name[:-4]
+        try:
+            count = import_csv(store, pair, os.path.join(source_dir, file_name), timeframe)
+            logger.info(f"Imported {count} {timeframe} bars for {pair}")
+        except Exception as e:
+            logger.error(f"Error importing {file_name}: {e}")
+
+if __name__ == "__main__":
+    import_historical_data(BarStore())
@@ -0,0 +1,31 @@
+import os
+from db_api import db_pool
+
+MIGRATIONS_DIR = 'migrations'
+
+def applied_migrations(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT NOW())")
+    cursor.execute("SELECT name FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(migrations_dir=MIGRATIONS_DIR):
+    # Each file runs in its own transaction and is recorded, so re-running only applies new ones
+    applied = []
+    with db_pool.connection() as conn:
+        done = applied_migrations(conn)
+    for name in sorted(f for f in os.listdir(migrations_dir) if f.endswith('.sql')):
+        if name in done:
+            continue
+        with open(os.path.join(migrations_dir, name), 'r') as f:
+            sql = f.read()
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+        applied.append(name)
+    return applied
+
+if __name__ == "__main__":
+    applied = migrate()
+    print(f"Applied {len(applied)} migrations: {', '.join(applied) or 'none'}")
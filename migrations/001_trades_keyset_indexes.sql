@@ -0,0 +1,11 @@
+-- Stable tiebreaker for keyset pagination; appended last so positional reads of the first five columns are unchanged
+ALTER TABLE trades ADD COLUMN IF NOT EXISTS id BIGSERIAL;
+
+-- /fetch_trades orders by (timestamp, id) and pages with (timestamp, id) > (last_timestamp, last_id)
+CREATE UNIQUE INDEX IF NOT EXISTS trades_timestamp_id_idx ON trades (timestamp, id);
+
+-- Pair and action filters keep the same order, so a filtered page is still an index range scan
+CREATE INDEX IF NOT EXISTS trades_pair_timestamp_id_idx ON trades (pair, timestamp, id);
+CREATE INDEX IF NOT EXISTS trades_action_timestamp_id_idx ON trades (action, timestamp, id);
+
+ANALYZE trades;
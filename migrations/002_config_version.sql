@@ -0,0 +1,2 @@
+-- Bumped by /set_config on every write; /get_config returns it and derives its ETag from it
+ALTER TABLE config ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import itertools
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.logger import setup_logging
+from utils.bar_store import BarStore
+from utils.indicators import compute_indicators
+from utils.backtesting import ensure_history, load_history, model_signal, quote_to_usd, simulate, report_metrics, report_value
+
+logger = setup_logging('optimize.log')
+
+# Swept per pair; names follow the tester's input columns
+PARAMETER_GRID = {
+    'StopLossATR': [1.0, 1.5, 2.0, 3.0],
+    'TakeProfitATR': [1.5, 2.0, 3.0, 4.5],
+    'LookBack': [10, 14, 20],
+    'HoldingSeconds': [3600, 4 * 3600, 24 * 3600, 3 * 24 * 3600],
+    'ProfitTarget': [100.0, 200.0],
+    'LossLimit': [50.0, 100.0],
+}
+SHARED_COLUMNS = ['High', 'Low', 'Close', 'usd_factor', 'signal']
+# The indicators simulate() reads; only these are kept per (pair, LookBack)
+SIMULATED_INDICATORS = ['SMA', 'EMA', 'ATR']
+REPORT_FIELDS = ['Symbol', 'Pass', 'Result', 'Profit', 'Expected Payoff', 'Profit Factor', 'Recovery Factor', 'Sharpe Ratio', 'Custom', 'Equity DD %', 'Trades']
+
+shared_blocks = {}
+worker_data = {}
+indicator_cache = {}
+
+def candidates(grid=PARAMETER_GRID):
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+def candidate_key(pair, params, timeframe, prune_fraction, prune_factor):
+    # Every setting that changes a record is in the key, so a checkpoint is never reused under another configuration
+    settings = {'timeframe': timeframe, 'prune_fraction': prune_fraction, 'prune_factor': prune_factor}
+    return f"{pair}|{json.dumps(settings, sort_keys=True)}|{json.dumps(params, sort_keys=True)}"
+
+def share_pair(pair, timeframe):
+    # One shared block per pair holding its price, conversion and signal columns side by side
+    data = load_history(pair, timeframe)
+    columns = np.column_stack([
+        data['High'].to_numpy(dtype=float),
+        data['Low'].to_numpy(dtype=float),
+        data['Close'].to_numpy(dtype=float),
+        quote_to_usd(pair, data, timeframe),
+        model_signal(pair, data, timeframe=timeframe).astype(float),
+    ])
+    block = shared_memory.SharedMemory(create=True, size=max(columns.nbytes, 1))
+    np.ndarray(columns.shape, dtype=np.float64, buffer=block.buf)[:] = columns
+    shared_blocks[pair] = block
+    return block.name, columns.shape, data.index.asi8
+
+def init_worker(specs):
+    # Workers map the parent's blocks instead of each loading its own copy of every series
+    for pair, (name, shape, index) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        shared_blocks[pair] = block
+        worker_data[pair] = (np.ndarray(shape, dtype=np.float64, buffer=block.buf), pd.DatetimeIndex(index, tz='UTC'))
+
+def pair_frame(pair, look_back):
+    # Only the indicator arrays are cached; the frame is rebuilt around them and the shared-memory views on every call,
+    # so the price columns are never copied into the worker
+    columns, index = worker_data[pair]
+    frame = {name: columns[:, i] for i, name in enumerate(SHARED_COLUMNS)}
+    key = (pair, look_back)
+    if key not in indicator_cache:
+        indicators = compute_indicators(pd.DataFrame(frame, index=index, copy=False), period=look_back)
+        indicator_cache[key] = {name: indicators[name].to_numpy(dtype=float, copy=True) for name in SIMULATED_INDICATORS}
+    frame.update(indicator_cache[key])
+    return pd.DataFrame(frame, index=index, copy=False)
+
+def evaluate(pair, params, timeframe, prune_fraction, prune_factor):
+    data = pair_frame(pair, params['LookBack'])
+    kwargs = {
+        'timeframe': timeframe,
+        'sl_atr': params['StopLossATR'],
+        'tp_atr': params['TakeProfitATR'],
+        'holding_seconds': params['HoldingSeconds'],
+        'profit_target': params['ProfitTarget'],
+        'loss_limit': params['LossLimit'],
+    }
+    signal = data['signal'].to_numpy() > 0.5
+    usd_factor = data['usd_factor'].to_numpy()
+    # Early pruning: a candidate that loses badly on the first part of the history is not run in full.
+    # Without a losing trade there the Profit Factor says nothing bad, so such a candidate always runs in full.
+    if prune_fraction:
+        head = int(len(data) * prune_fraction)
+        pnl, _, _ = simulate(data.iloc[:head], signal[:head], usd_factor[:head], **kwargs)
+        metrics = report_metrics(pair, pnl)
+        if (pnl < 0).any() and metrics['Profit Factor'] < prune_factor:
+            return {'pruned': True, **metrics}
+    pnl, _, _ = simulate(data, signal, usd_factor, **kwargs)
+    return {'pruned': False, **report_metrics(pair, pnl)}
+
+def evaluate_chunk(chunk, timeframe, prune_fraction, prune_factor):
+    return [evaluate(pair, params, timeframe, prune_fraction, prune_factor) for pair, _, params in chunk]
+
+def load_checkpoint(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record['key']] = record
+    return done
+
+def best_passes(records, criterion='Result'):
+    best = {}
+    for record in records:
+        if record['pruned']:
+            continue
+        current = best.get(record['Symbol'])
+        if current is None or record[criterion] > current[criterion]:
+            best[record['Symbol']] = record
+    return best
+
+def write_optimization_data(best, path='optimization_data.json'):
+    # Same layout as convert_xml_to_json.py output: string values keyed by Symbol, inputs after the report columns
+    data = {}
+    for symbol, record in sorted(best.items(), key=lambda item: -item[1]['Result']):
+        row = {field: str(report_value(record.get(field, 0))) for field in REPORT_FIELDS}
+        row.update({name: str(value) for name, value in record['params'].items()})
+        data[symbol] = row
+    with open(path, 'w') as json_file:
+        json.dump(data, json_file, indent=4)
+
+def optimize(pairs, timeframe='1d', processes=None, checkpoint='optimizer_checkpoint.jsonl', prune_fraction=0.5, prune_factor=0.7, grid=PARAMETER_GRID, chunk_size=64):
+    start = time.perf_counter()
+    store = BarStore()
+    for symbol in sorted(f[:-4] for f in os.listdir('data/historical_data') if f.endswith('.csv')):
+        ensure_history(store, symbol, timeframe, refresh=True)
+
+    done = load_checkpoint(checkpoint)
+    grid_candidates = list(candidates(grid))
+    todo = [(pair, number, params) for pair in pairs for number, params in enumerate(grid_candidates, 1)
+            if candidate_key(pair, params, timeframe, prune_fraction, prune_factor) not in done]
+    logger.info(f"Optimizing {len(pairs)} pairs x {len(grid_candidates)} candidates, {len(done)} already in {checkpoint}")
+
+    try:
+        specs = {pair: share_pair(pair, timeframe) for pair in pairs}
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(specs,)) as pool, open(checkpoint, 'a') as log:
+            # Candidates go out in chunks so per-task IPC does not dominate the cheap vectorized backtests
+            chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+            futures = {pool.submit(evaluate_chunk, chunk, timeframe, prune_fraction, prune_factor): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"Error evaluating {len(chunk)} candidates for {chunk[0][0]}: {e}")
+                    continue
+                for (pair, number, params), record in zip(chunk, results):
+                    record.update({'key': candidate_key(pair, params, timeframe, prune_fraction, prune_factor), 'Pass': number, 'params': params})
+                    done[record['key']] = record
+                    log.write(json.dumps(record) + '\n')
+                log.flush()
+    finally:
+        for block in shared_blocks.values():
+            block.close()
+            block.unlink()
+        shared_blocks.clear()
+
+    keys = {candidate_key(pair, params, timeframe, prune_fraction, prune_factor) for pair in pairs for params in grid_candidates}
+    records = [record for key, record in done.items() if key in keys]
+    pruned = sum(record['pruned'] for record in records)
+    logger.info(f"Evaluated {len(todo)} candidates in {time.perf_counter() - start:.2f}s, {pruned} pruned")
+    return best_passes(records)
+
+if __name__ == "__main__":
+    pairs = sorted(f[:-4] for f in os.listdir('data/historical_data') if f.endswith('.csv'))
+    best = optimize(pairs)
+    write_optimization_data(best)
+    print(f"Wrote {len(best)} symbols to optimization_data.json")
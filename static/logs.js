@@ -0,0 +1,27 @@
+document.addEventListener('DOMContentLoaded', function () {
+    let source = null;
+    let logLines = document.getElementById('logLines');
+
+    document.getElementById('follow').addEventListener('change', function (e) {
+        if (source) {
+            source.close();
+            source = null;
+        }
+        if (!e.target.checked) {
+            return;
+        }
+        let params = new URLSearchParams(new FormData(document.getElementById('logFilter')));
+        params.delete('lines');
+        source = new EventSource('/logs/stream?' + params.toString());
+        source.onmessage = function (event) {
+            let atBottom = window.innerHeight + window.scrollY >= document.body.offsetHeight - 10;
+            logLines.appendChild(document.createTextNode(event.data + '\n'));
+            if (atBottom) {
+                window.scrollTo(0, document.body.scrollHeight);
+            }
+        };
+        source.onerror = function (error) {
+            console.error('Error:', error);
+        };
+    });
+});
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.bar_store import BarStore
+
+def bars(start, count):
+    index = pd.date_range(start, periods=count, freq='h', tz='UTC')
+    close = np.arange(count, dtype=float) + 1.0
+    return pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close, 'Volume': close * 10}, index=index)
+
+def test_append_after_torn_write_realigns_columns(tmp_path):
+    store = BarStore(str(tmp_path))
+    first = bars('2024-01-01', 5)
+    assert store.append('EURUSD', '1h', first) == 5
+
+    # An append interrupted after the time and open columns were written
+    for column in ['time', 'open']:
+        with open(store.path('EURUSD', '1h', column), 'ab') as f:
+            f.write(np.zeros(3, dtype=np.float64).tobytes())
+    assert store.length('EURUSD', '1h') == 5
+
+    second = bars('2024-01-01 05:00', 4)
+    assert store.append('EURUSD', '1h', second) == 4
+    frame = BarStore(str(tmp_path)).read_frame('EURUSD', '1h')
+    expected = pd.concat([first, second])
+    assert len(frame) == 9
+    assert (frame.index == expected.index).all()
+    np.testing.assert_array_equal(frame['Open'].to_numpy(), expected['Open'].to_numpy())
+    np.testing.assert_array_equal(frame['Close'].to_numpy(), expected['Close'].to_numpy())
+    sizes = {os.path.getsize(store.path('EURUSD', '1h', column)) for column in ['time', 'open', 'close']}
+    assert sizes == {9 * 8}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+from utils.indicators import INDICATOR_COLUMNS, IndicatorCache, compute_indicators
+
+TOLERANCE = {'rtol': 1e-7, 'atol': 1e-7}
+
+@pytest.fixture(scope='module')
+def bars():
+    # Fixed random walk, so every run compares the same series
+    rng = np.random.default_rng(42)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.001, 600)))
+    open_ = np.concatenate([[1.1], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.0005, (2, len(close))))
+    index = pd.date_range('2024-01-01', periods=len(close), freq='h')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + wick[0],
+        'Low': np.minimum(open_, close) - wick[1],
+        'Close': close,
+    }, index=index)
+
+def talib_indicators(data):
+    # The same calls get_technical_indicators makes on the full history
+    close = data['Close']
+    expected = pd.DataFrame(index=data.index)
+    expected['SMA'] = talib.SMA(close, timeperiod=14)
+    expected['EMA'] = talib.EMA(close, timeperiod=14)
+    expected['MACD'], expected['MACD_signal'], expected['MACD_hist'] = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    expected['RSI'] = talib.RSI(close, timeperiod=14)
+    expected['BB_upper'], expected['BB_middle'], expected['BB_lower'] = talib.BBANDS(close, timeperiod=14, nbdevup=2, nbdevdn=2, matype=0)
+    expected['ATR'] = talib.ATR(data['High'], data['Low'], close, timeperiod=14)
+    return expected
+
+def assert_matches(actual, expected):
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   equal_nan=True, err_msg=column, **TOLERANCE)
+
+def test_compute_indicators_matches_talib(bars):
+    assert_matches(compute_indicators(bars), talib_indicators(bars))
+
+def test_incremental_updates_match_talib(bars):
+    # A sliding window that gains one bar per call, as the live loop sees it; the last bar is still forming
+    expected = talib_indicators(bars)
+    cache = IndicatorCache(period=14, fast_period=12, slow_period=26, signal_period=9, nbdev=2)
+    window = 300
+    for end in range(window, len(bars) + 1, 7):
+        data = bars.iloc[:end].tail(window)
+        assert_matches(cache.compute('EURUSD', data), expected.loc[data.index])
+
+def test_changed_history_restarts_the_engine(bars):
+    cache = IndicatorCache(period=14, fast_period=12, slow_period=26, signal_period=9, nbdev=2)
+    cache.compute('EURUSD', bars.iloc[:400])
+    # Bars the engine never saw before its start: it has to warm up again from the new window
+    earlier = bars.iloc[50:350]
+    assert_matches(cache.compute('EURUSD', earlier), talib_indicators(earlier))
@@ -0,0 +1,83 @@
+import types
+import pytest
+import requests
+from utils import sentiment
+from utils.sentiment import SentimentCache
+
+class Response:
+    def __init__(self, titles, status=200):
+        self.titles = titles
+        self.status = status
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise requests.HTTPError(f"{self.status} error")
+
+    def json(self):
+        return {'status': 'ok', 'articles': [{'title': title} for title in self.titles]}
+
+class Session:
+    # Stands in for requests.Session: records every outbound call and answers with fixed headlines per query
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params['q'])
+        return Response([f"{params['q']} rallies", f"{params['q']} slips", 'Markets steady'], self.status)
+
+@pytest.fixture
+def clock(monkeypatch):
+    # utils.sentiment reads time.monotonic through its module global, so the TTL runs on this clock
+    now = [1000.0]
+    monkeypatch.setattr(sentiment, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def cache_with(session, **kwargs):
+    cache = SentimentCache('key', **kwargs)
+    cache.session = session
+    return cache
+
+def test_one_outbound_call_per_currency_per_ttl(clock):
+    session = Session()
+    cache = cache_with(session, ttl=900)
+    for _ in range(3):
+        for pair in ['EURUSD', 'GBPUSD', 'EURGBP']:
+            cache.pair_sentiment(pair)
+    assert sorted(session.calls) == ['EUR', 'GBP', 'USD']
+
+    stats = cache.stats()
+    assert stats['pair_lookups'] == 9
+    assert stats['outbound_calls'] == 3
+    assert stats['query_misses'] == 3
+    assert stats['query_hits'] == 15
+    # 7 distinct headlines: two per currency plus the shared one
+    assert stats['cached_headlines'] == 7
+    assert stats['polarity_misses'] == 7
+    assert stats['polarity_hits'] == 9 * 5 - 7
+
+    clock[0] += 901
+    cache.pair_sentiment('EURUSD')
+    assert sorted(session.calls) == ['EUR', 'EUR', 'GBP', 'USD', 'USD']
+    assert cache.stats()['query_misses'] == 5
+
+def test_failures_are_cached_for_failure_ttl(clock):
+    session = Session(status=500)
+    cache = cache_with(session, ttl=900, failure_ttl=60)
+    with pytest.raises(requests.HTTPError):
+        cache.headlines('EUR')
+    assert cache.headlines('EUR') == []
+    assert session.calls == ['EUR']
+    assert cache.stats()['query_failures'] == 1
+
+    session.status = 200
+    clock[0] += 61
+    assert cache.headlines('EUR') == ['EUR rallies', 'EUR slips', 'Markets steady']
+    assert session.calls == ['EUR', 'EUR']
+
+def test_scores_survive_eviction(clock):
+    cache = cache_with(Session(), max_headlines=2)
+    titles = ['EUR rallies', 'EUR slips', 'Markets steady']
+    first = cache.score(titles)
+    assert len(cache.polarity) == 2
+    assert cache.score(titles) == first
@@ -1,9 +1,21 @@
 import os
+import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
-from keras.models import Sequential
-from keras.layers import Input, LSTM, Dense
+from numpy.lib.stride_tricks import sliding_window_view
 from utils.logger import setup_logging
+from utils.indicators import compute_indicators
+from utils.xgb_store import XGBModelStore, TIMEFRAME as XGB_TIMEFRAME
+from utils.data_fetcher import fetch_bars
+from utils.bar_store import BarStore, import_csv
+from utils.lstm_numpy import export_model, max_difference, numpy_path
+from config import load_config
+
+logger = setup_logging('train_models.log')
 
 currency_pairs = [
     "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD", "EURGBP", "EURJPY",
@@ -14,45 +26,192 @@ currency_pairs = [
     "USDPHP", "USDMYR", "USDVND"
 ]
 
-logger = setup_logging('train_models.log')
+MANIFEST_PATH = 'models/manifest.json'
+TIMEFRAME = '1d'
+# The XGBoost models are trained on the live loop's XGB_TIMEFRAME bars, downloaded up to this far back on first use.
+# yfinance serves hourly bars for the last 730 days only.
+XGB_HISTORY_PERIOD = '1y'
+MIN_XGB_BARS = 200
+DEFAULT_TRAINING = {
+    'look_back': 10,
+    'epochs': 20,
+    'batch_size': 32,
+    'validation_split': 0.2,
+    'patience': 3,
+    'workers': 2,
+    'threads_per_worker': 1,
+    'export_tolerance': 1e-4,
+}
+# Only these settings change the trained models; worker counts do not invalidate the manifest
+MODEL_PARAMS = ['look_back', 'epochs', 'batch_size', 'validation_split', 'patience']
 
 def create_dataset(data, look_back=1):
-    X, Y = [], []
-    for i in range(len(data) - look_back):
-        a = data[i:(i + look_back), 0]
-        X.append(a)
-        Y.append(data[i + look_back, 0])
-    return np.array(X), np.array(Y)
-
-for pair in currency_pairs:
-    try:
-        df = pd.read_csv(f'data/historical_data/{pair}.csv')
-        df['Close'] = df['Close'].astype(float)
-
-        dataset = df['Close'].values
-        dataset = dataset.reshape(-1, 1)
-        look_back = 10
-        X, Y = create_dataset(dataset, look_back)
-
-        train_size = int(len(X) * 0.8)
-        X_train, X_test = X[:train_size], X[train_size:]
-        Y_train, Y_test = Y[:train_size], Y[train_size:]
-
-        X_train = np.reshape(X_train, (X_train.shape[0], X_train.shape[1], 1))
-        X_test = np.reshape(X_test, (X_test.shape[0], X_test.shape[1], 1))
-
-        model = Sequential()
-        model.add(Input(shape=(look_back, 1)))
-        model.add(LSTM(50, return_sequences=True))
-        model.add(LSTM(50))
-        model.add(Dense(1))
-        model.compile(loss='mean_squared_error', optimizer='adam')
-
-        model.fit(X_train, Y_train, epochs=20, batch_size=1, verbose=2)
-
-        model_path = f'models/lstm_model_{pair}.keras'
-        model.save(model_path)
-        logger.info(f"Model for {pair} saved at {model_path}")
-
-    except Exception as e:
-        logger.error(f"Error processing {pair}: {e}")
+    # Strided views over the series: row i is data[i:i + look_back], its target data[i + look_back]
+    windows = sliding_window_view(data[:, 0], look_back + 1)
+    return windows[:, :look_back], windows[:, look_back]
+
+def data_hash(history):
+    digest = hashlib.sha256()
+    for column in ['Open', 'High', 'Low', 'Close']:
+        digest.update(np.ascontiguousarray(history[column].to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(history.index.asi8).tobytes())
+    return digest.hexdigest()
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps({name: params[name] for name in MODEL_PARAMS}, sort_keys=True).encode()).hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, path)
+
+def train_pair(pair, params):
+    # Imported here so each spawned worker starts TensorFlow with the thread limits set by the parent
+    from keras.models import Sequential
+    from keras.layers import Input, LSTM, Dense
+    from keras.callbacks import EarlyStopping
+
+    start = time.perf_counter()
+    history = BarStore().read_frame(pair, TIMEFRAME)
+    xgb_history = BarStore().read_frame(pair, XGB_TIMEFRAME)
+    if len(xgb_history) < MIN_XGB_BARS:
+        raise ValueError(f"{len(xgb_history)} {XGB_TIMEFRAME} bars for the XGBoost model, at least {MIN_XGB_BARS} needed")
+
+    # The LSTMs are trained newest-first, the same order the EA sends its closes in
+    dataset = history['Close'].to_numpy()[::-1]
+    dataset = dataset.reshape(-1, 1)
+    look_back = params['look_back']
+    X, Y = create_dataset(dataset, look_back)
+
+    train_size = int(len(X) * (1 - params['validation_split']))
+    X_train, X_test = X[:train_size], X[train_size:]
+    Y_train, Y_test = Y[:train_size], Y[train_size:]
+
+    X_train = X_train[..., np.newaxis]
+    X_test = X_test[..., np.newaxis]
+
+    model = Sequential()
+    model.add(Input(shape=(look_back, 1)))
+    model.add(LSTM(50, return_sequences=True))
+    model.add(LSTM(50))
+    model.add(Dense(1))
+    model.compile(loss='mean_squared_error', optimizer='adam')
+
+    callbacks = []
+    validation_data = None
+    if len(X_test):
+        validation_data = (X_test, Y_test)
+        callbacks.append(EarlyStopping(monitor='val_loss', patience=params['patience'], restore_best_weights=True))
+    fit = model.fit(X_train, Y_train, epochs=params['epochs'], batch_size=params['batch_size'],
+                    validation_data=validation_data, callbacks=callbacks, verbose=0)
+
+    model_path = f'models/lstm_model_{pair}.keras'
+    model.save(model_path)
+    # Serving runs the NumPy export, so it is checked against Keras on the held-out windows
+    numpy_model = export_model(model, numpy_path(model_path))
+    export_difference = max_difference(model, numpy_model, X_test if len(X_test) else X_train)
+    if export_difference > params['export_tolerance']:
+        raise ValueError(f"NumPy export differs from Keras by {export_difference:.2e}")
+    lstm_seconds = time.perf_counter() - start
+
+    xgb_models = XGBModelStore([pair])
+    xgb_models.train(pair, xgb_history.join(compute_indicators(xgb_history)))
+
+    return {
+        'model_path': model_path,
+        'numpy_model_path': numpy_path(model_path),
+        'export_difference': export_difference,
+        'xgb_model_path': xgb_models.model_path(pair),
+        'epochs': len(fit.history['loss']),
+        'loss': float(fit.history['loss'][-1]),
+        'val_loss': float(min(fit.history['val_loss'])) if 'val_loss' in fit.history else None,
+        'xgb_accuracy': xgb_models.meta[pair]['accuracy'],
+        'rows': len(history),
+        'lstm_seconds': round(lstm_seconds, 3),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+def main():
+    config = load_config()
+    params = {**DEFAULT_TRAINING, **config.get('training', {})}
+    bar_store = BarStore()
+    manifest = load_manifest()
+    current_params_hash = params_hash(params)
+
+    jobs = {}
+    skipped = []
+    failed = []
+    for pair in currency_pairs:
+        try:
+            # import_csv only appends bars newer than the stored ones, so running it every time brings CSV updates into
+            # the store, and so into data_hash
+            csv_path = f'data/historical_data/{pair}.csv'
+            if os.path.exists(csv_path) or bar_store.last_time(pair, TIMEFRAME) is None:
+                import_csv(bar_store, pair, csv_path)
+            history = bar_store.read_frame(pair, TIMEFRAME)
+        except Exception as e:
+            logger.error(f"Error processing {pair}: {e}")
+            failed.append(pair)
+            continue
+        # create_dataset needs look_back bars plus the target for even one window
+        if len(history) < params['look_back'] + 1:
+            logger.warning(f"Skipping {pair}: {len(history)} bars, at least {params['look_back'] + 1} needed for look_back {params['look_back']}")
+            skipped.append(pair)
+            continue
+        pair_hash = data_hash(history)
+        entry = manifest.get(pair)
+        if (entry and entry['data_hash'] == pair_hash and entry['params_hash'] == current_params_hash
+                and all(os.path.exists(entry.get(key, '')) for key in ['model_path', 'numpy_model_path', 'xgb_model_path'])):
+            logger.info(f"Skipping {pair}: data and parameters unchanged since {entry['trained_at']}")
+            skipped.append(pair)
+            continue
+        # Workers only read the store, so the XGBoost bars are brought up to date here
+        try:
+            fetch_bars(bar_store, pair, XGB_TIMEFRAME, period=XGB_HISTORY_PERIOD)
+        except Exception as e:
+            logger.warning(f"Could not update {XGB_TIMEFRAME} bars for {pair}: {e}")
+        jobs[pair] = pair_hash
+
+    # Children inherit these, so every worker's BLAS and TensorFlow pools stay within their share of the cores
+    for var in ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS']:
+        os.environ[var] = str(params['threads_per_worker'])
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=params['workers'], mp_context=context) as pool:
+        futures = {pool.submit(train_pair, pair, params): pair for pair in jobs}
+        for future in as_completed(futures):
+            pair = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                logger.error(f"Error processing {pair}: {e}")
+                failed.append(pair)
+                continue
+            manifest[pair] = {
+                **summary,
+                'source': f'{bar_store.root}/{pair}/{TIMEFRAME}',
+                'data_hash': jobs[pair],
+                'params_hash': current_params_hash,
+                'params': {name: params[name] for name in MODEL_PARAMS},
+                'trained_at': pd.Timestamp.now(tz='UTC').isoformat(),
+            }
+            save_manifest(manifest)
+            logger.info(f"Model for {pair} saved at {summary['model_path']} in {summary['seconds']:.2f}s "
+                        f"(epochs {summary['epochs']}, loss {summary['loss']:.6g}, val_loss {summary['val_loss']}, "
+                        f"xgb accuracy {summary['xgb_accuracy']})")
+
+    trained = len(jobs) - len([pair for pair in failed if pair in jobs])
+    logger.info(f"Trained {trained} pairs, skipped {len(skipped)}, failed {len(failed)}, in {time.perf_counter() - start:.2f}s")
+    if failed:
+        logger.error(f"Failed pairs: {', '.join(sorted(failed))}")
+
+if __name__ == "__main__":
+    main()
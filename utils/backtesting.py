@@ -1 +1 @@
-import pandas as pdfrom utils.logger import setup_logginglogger = setup_logging('backtesting.log')def run_backtest(pair):    try:        data = pd.read_csv(f'data/historical_data/{pair}.csv')        # Implement backtesting logic here        # This is just a placeholder        results = {            "total_trades": 100,            "winning_trades": 60,            "losing_trades": 40,            "profit_factor": 1.5,            "net_profit": 1000        }        logger.info(f"Backtest results for {pair}: {results}")        return results    except Exception as e:        logger.error(f"Error in backtesting: {e}")        return {}
\ No newline at end of file
+import osimport sysimport numpy as npimport pandas as pdfrom concurrent.futures import ProcessPoolExecutorfrom numpy.lib.stride_tricks import sliding_window_viewfrom utils.logger import setup_loggingfrom utils.bar_store import BarStore, INTERVAL_SECONDS, import_csvfrom utils.indicators import compute_indicatorsfrom utils.xgb_store import XGBModelStore, FEATURE_COLUMNS, LOOK_BACK, TIMEFRAME as XGB_TIMEFRAMElogger = setup_logging('backtesting.log')CONTRACT_SIZE = 100000# The tester reports an unbounded Profit or Recovery Factor (no losing trade, no drawdown) as DBL_MAXDBL_MAX = sys.float_info.maxdef ensure_history(store, pair, timeframe='1d', source_dir='data/historical_data', refresh=False):    # With refresh the CSV is imported even into a filled store; import_csv only appends bars newer than the stored ones    path = os.path.join(source_dir, f'{pair}.csv')    if (refresh and os.path.exists(path)) or store.last_time(pair, timeframe) is None:        import_csv(store, pair, path, timeframe)def load_history(pair, timeframe='1d', store_root='data/bars'):    store = BarStore(store_root)    ensure_history(store, pair, timeframe)    data = store.read_frame(pair, timeframe)    return data.join(compute_indicators(data))def quote_to_usd(pair, data, timeframe='1d', store_root='data/bars'):    # Per-bar factor turning a quote-currency amount into USD, the tester's deposit currency    base, quote = pair[:3], pair[3:6]    close = data['Close'].to_numpy()    if quote == 'USD':        return np.ones(len(data))    if base == 'USD':        return 1.0 / close    store = BarStore(store_root)    for symbol, invert in ((f'USD{quote}', True), (f'{quote}USD', False)):        if store.last_time(symbol, timeframe) is not None:            rate = store.read_frame(symbol, timeframe)['Close'].reindex(data.index, method='ffill').to_numpy()            return 1.0 / rate if invert else rate    logger.warning(f"No USD rate for {quote}, {pair} profits are left in {quote}")    return np.ones(len(data))def model_signal(pair, data, model_dir='models', timeframe=XGB_TIMEFRAME):    # The stored XGBoost model when there is one and the bars are of the timeframe it was trained on, otherwise    # close-above-SMA momentum as a stand-in    store = XGBModelStore([pair], model_dir=model_dir)    signal = (data['Close'] > data['SMA']).to_numpy()    if timeframe == XGB_TIMEFRAME and os.path.exists(store.model_path(pair)):        store.load_all()        features = data[FEATURE_COLUMNS].to_numpy(dtype=float)        if len(features) >= LOOK_BACK:            windows = sliding_window_view(features, (LOOK_BACK, features.shape[1]))[:, 0].reshape(len(features) - LOOK_BACK + 1, -1)            valid = ~np.isnan(windows).any(axis=1)            proba = np.zeros(len(windows))            if valid.any():                proba[valid] = store.models[pair].predict_proba(windows[valid])[:, 1]            signal = np.zeros(len(data), dtype=bool)            signal[LOOK_BACK - 1:] = proba > 0.5    return signaldef simulate(data, signal, usd_factor, timeframe='1d', lot_size=0.1, sentiment=0.0, profit_target=100.0, loss_limit=50.0,             holding_seconds=3600, sl_atr=1.5, tp_atr=3.0, volatility_factor=1.5):    high = data['High'].to_numpy(dtype=float)    low = data['Low'].to_numpy(dtype=float)    close = data['Close'].to_numpy(dtype=float)    atr = data['ATR'].to_numpy(dtype=float)    n = len(close)    horizon = max(1, int(np.ceil(holding_seconds / INTERVAL_SECONDS[timeframe])))    # Entry rules from execute_trades, with the ATR mean taken over bars seen so far    trend = data['SMA'].to_numpy() > data['EMA'].to_numpy()    atr_mean = pd.Series(atr).expanding().mean().to_numpy()    volatile = atr > atr_mean * volatility_factor    favourable = (sentiment > 0) & trend & ~volatile    direction = np.where(favourable == signal, 1.0, -1.0)    can_enter = ~np.isnan(atr) & ~np.isnan(data['SMA'].to_numpy()) & ~np.isnan(data['EMA'].to_numpy())    can_enter[n - 1:] = False    # Every bar's forward window of `horizon` bars, padded past the end of the data    pad = np.full(horizon, np.nan)    fwd_high = sliding_window_view(np.concatenate([high[1:], pad]), horizon)[:n]    fwd_low = sliding_window_view(np.concatenate([low[1:], pad]), horizon)[:n]    fwd_close = sliding_window_view(np.concatenate([close[1:], pad]), horizon)[:n]    fwd_factor = sliding_window_view(np.concatenate([usd_factor[1:], pad]), horizon)[:n]    d = direction[:, None]    entry = close[:, None]    sl = entry - d * sl_atr * atr[:, None]    tp = entry + d * tp_atr * atr[:, None]    units = lot_size * CONTRACT_SIZE    sl_hit = np.where(d > 0, fwd_low <= sl, fwd_high >= sl)    tp_hit = np.where(d > 0, fwd_high >= tp, fwd_low <= tp)    close_pnl = (fwd_close - entry) * d * units * fwd_factor    pl_hit = (close_pnl >= profit_target) | (close_pnl <= -loss_limit)    available = ~np.isnan(fwd_close)    any_hit = (sl_hit | tp_hit | pl_hit) & available    last_bar = np.maximum(available.sum(axis=1) - 1, 0)    exit_offset = np.where(any_hit.any(axis=1), any_hit.argmax(axis=1), last_bar)    rows = np.arange(n)    # Stop-loss wins when both levels are touched in the same bar    exit_price = np.where(sl_hit[rows, exit_offset], sl[:, 0],                          np.where(tp_hit[rows, exit_offset], tp[:, 0], fwd_close[rows, exit_offset]))    pnl = (exit_price - close) * direction * units * fwd_factor[rows, exit_offset]    exit_index = rows + 1 + exit_offset    # One position per pair, as in the EA: the next entry comes after the previous exit    trades = []    candidates = np.flatnonzero(can_enter & available[:, 0])    for i in candidates:        if trades and i < exit_index[trades[-1]]:            continue        trades.append(i)    trades = np.array(trades, dtype=int)    return pnl[trades], trades, exit_index[trades]def ratio(numerator, denominator):    if denominator > 0:        return round(float(numerator / denominator), 6)    return float('inf') if numerator > 0 else 0.0def report_value(value):    # inf is not valid JSON, so reports carry DBL_MAX in its place as the tester does    return DBL_MAX if value == float('inf') else valuedef report_metrics(pair, pnl, initial_deposit=10000.0):    balance = initial_deposit + np.concatenate([[0.0], np.cumsum(pnl)])    peak = np.maximum.accumulate(balance)    drawdown = peak - balance    max_drawdown = drawdown.max()    gross_profit = pnl[pnl > 0].sum()    gross_loss = -pnl[pnl < 0].sum()    returns = pnl / balance[:-1]    profit = float(pnl.sum())    return {        'Symbol': pair,        'Result': round(float(balance[-1]), 2),        'Profit': round(profit, 2),        'Expected Payoff': round(profit / len(pnl), 6) if len(pnl) else 0.0,        'Profit Factor': ratio(gross_profit, gross_loss),        'Recovery Factor': ratio(profit, max_drawdown),        'Sharpe Ratio': round(float(returns.mean() / returns.std()), 6) if len(returns) > 1 and returns.std() > 0 else 0.0,        'Equity DD %': round(float((drawdown / peak).max() * 100), 4),        'Trades': int(len(pnl)),    }def run_backtest(pair, timeframe='1d', initial_deposit=10000.0, **params):    try:        data = load_history(pair, timeframe)        signal = model_signal(pair, data, timeframe=timeframe)        pnl, _, _ = simulate(data, signal, quote_to_usd(pair, data, timeframe), timeframe, **params)        results = report_metrics(pair, pnl, initial_deposit)        logger.info(f"Backtest results for {pair}: {results}")        return results    except Exception as e:        logger.error(f"Error in backtesting: {e}")        return {}def run_backtests(pairs, processes=None, **params):    # Import new CSV history up front so workers never race on the store or miss a USD conversion pair    store = BarStore()    for symbol in sorted(f[:-4] for f in os.listdir('data/historical_data') if f.endswith('.csv')):        ensure_history(store, symbol, params.get('timeframe', '1d'), refresh=True)    with ProcessPoolExecutor(max_workers=processes) as pool:        futures = {pair: pool.submit(run_backtest, pair, **params) for pair in pairs}        return {pair: future.result() for pair, future in futures.items()}if __name__ == "__main__":    import json    import time    pairs = sorted(f[:-4] for f in os.listdir('data/historical_data') if f.endswith('.csv'))    start = time.perf_counter()    results = run_backtests(pairs)    print(json.dumps({pair: {name: report_value(value) for name, value in metrics.items()} for pair, metrics in results.items()}, indent=4))    print(f"Backtested {len(pairs)} pairs in {time.perf_counter() - start:.2f}s")
\ No newline at end of file
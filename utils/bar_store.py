@@ -0,0 +1,129 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# One flat binary file per column, appended in time order and memory-mapped for reads
+COLUMNS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+FRAME_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '1d': 86400}
+
+def to_epoch_seconds(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.values.astype('datetime64[s]').astype(np.int64)
+
+def flatten_columns(data):
+    # yfinance returns (field, ticker) columns for a single ticker in recent versions
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+class BarStore:
+    def __init__(self, root='data/bars'):
+        self.root = root
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def path(self, symbol, timeframe, column):
+        return os.path.join(self.root, symbol, timeframe, f'{column}.bin')
+
+    def length(self, symbol, timeframe):
+        # Columns are appended one after another; a torn write leaves the shortest column authoritative
+        sizes = []
+        for column, dtype in COLUMNS.items():
+            path = self.path(symbol, timeframe, column)
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def repair(self, symbol, timeframe):
+        # Cuts every column back to the shortest one, so the bars after an interrupted append line up again
+        n = self.length(symbol, timeframe)
+        for column, dtype in COLUMNS.items():
+            path = self.path(symbol, timeframe, column)
+            if os.path.exists(path) and os.path.getsize(path) > n * np.dtype(dtype).itemsize:
+                os.truncate(path, n * np.dtype(dtype).itemsize)
+
+    def columns(self, symbol, timeframe):
+        n = self.length(symbol, timeframe)
+        cached = self.maps.get((symbol, timeframe))
+        if cached is not None and cached[0] == n:
+            return cached[1]
+        if n == 0:
+            arrays = {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        else:
+            arrays = {column: np.memmap(self.path(symbol, timeframe, column), dtype=dtype, mode='r', shape=(n,))
+                      for column, dtype in COLUMNS.items()}
+        self.maps[(symbol, timeframe)] = (n, arrays)
+        return arrays
+
+    def last_time(self, symbol, timeframe):
+        times = self.columns(symbol, timeframe)['time']
+        return int(times[-1]) if len(times) else None
+
+    def append(self, symbol, timeframe, data):
+        # Only bars newer than the last stored one are written, so repeated downloads are idempotent
+        data = flatten_columns(data)
+        times = to_epoch_seconds(data.index)
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        with self.lock:
+            last = self.last_time(symbol, timeframe)
+            keep = np.ones(len(times), dtype=bool)
+            keep[1:] = times[1:] != times[:-1]
+            if last is not None:
+                keep &= times > last
+            if not keep.any():
+                return 0
+            os.makedirs(os.path.join(self.root, symbol, timeframe), exist_ok=True)
+            self.repair(symbol, timeframe)
+            values = {'time': times[keep]}
+            for column, name in FRAME_COLUMNS.items():
+                if name in data.columns:
+                    values[column] = data[name].to_numpy(dtype=np.float64)[order][keep]
+                else:
+                    values[column] = np.zeros(int(keep.sum()))
+            for column, dtype in COLUMNS.items():
+                with open(self.path(symbol, timeframe, column), 'ab') as f:
+                    f.write(np.ascontiguousarray(values[column], dtype=dtype).tobytes())
+            return int(keep.sum())
+
+    def read(self, symbol, timeframe, start=None, end=None):
+        # Views into the memory maps; start/end are inclusive and accept anything pd.Timestamp does
+        arrays = self.columns(symbol, timeframe)
+        times = arrays['time']
+        lo = 0 if start is None else int(np.searchsorted(times, to_epoch_seconds([start])[0], side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, to_epoch_seconds([end])[0], side='right'))
+        return {column: values[lo:hi] for column, values in arrays.items()}
+
+    def read_frame(self, symbol, timeframe, start=None, end=None):
+        arrays = self.read(symbol, timeframe, start, end)
+        index = pd.to_datetime(arrays['time'], unit='s', utc=True)
+        return pd.DataFrame({name: arrays[column] for column, name in FRAME_COLUMNS.items()}, index=index, copy=False)
+
+    def tail(self, symbol, timeframe, seconds):
+        last = self.last_time(symbol, timeframe)
+        if last is None:
+            return self.read_frame(symbol, timeframe)
+        return self.read_frame(symbol, timeframe, start=pd.Timestamp(last - seconds, unit='s'))
+
+    def closed_bars(self, data, timeframe, now=None):
+        # The newest bar from a live download is still forming and must not be stored yet
+        now = pd.Timestamp.now(tz='UTC') if now is None else now
+        times = to_epoch_seconds(data.index)
+        return data[times + INTERVAL_SECONDS[timeframe] <= to_epoch_seconds([now])[0]]
+
+def import_csv(store, symbol, path, timeframe='1d'):
+    # data/historical_data CSVs are newest-first with the date in the first, unnamed column
+    df = pd.read_csv(path)
+    df = df.set_index(pd.to_datetime(df[df.columns[0]])).drop(columns=df.columns[0])
+    return store.append(symbol, timeframe, df.astype(float))
@@ -0,0 +1,161 @@
+import time
+import threading
+import MetaTrader5 as mt5
+from utils.logger import setup_logging
+
+logger = setup_logging('trading.log')
+
+def position_dict(position):
+    return {
+        'order_id': position.ticket,
+        'pair': position.symbol,
+        'direction': 'buy' if position.type == mt5.ORDER_TYPE_BUY else 'sell',
+        'lots': position.volume,
+        'open_price': position.price_open,
+        'profit': position.profit,
+        'loss': position.price_open - position.price_current if position.type == mt5.ORDER_TYPE_BUY else position.price_current - position.price_open,
+        'open_time': position.time
+    }
+
+def account_dict(account_info):
+    return {
+        'balance': account_info.balance,
+        'equity': account_info.equity,
+        'margin': account_info.margin,
+        'free_margin': account_info.margin_free
+    }
+
+class SymbolCache:
+    # symbol_info kept for the life of the process, since digits, point and contract size do not change while it runs.
+    # The bid/ask in a cached entry go stale at once and are never read; quotes come from BrokerSnapshot.
+    def __init__(self):
+        self.info = {}
+        self.lock = threading.Lock()
+
+    def get(self, symbol):
+        with self.lock:
+            if symbol in self.info:
+                return self.info[symbol]
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            logger.error(f"Failed to get symbol info for {symbol}, error code = {mt5.last_error()}")
+            return None
+        if not info.visible and not mt5.symbol_select(symbol, True):
+            logger.error(f"Failed to select symbol {symbol}, error code = {mt5.last_error()}")
+            return None
+        self.add(info)
+        return info
+
+    def add(self, info):
+        # Only symbols already in Market Watch are cached from symbols_get; the rest go through get() to be selected
+        if info.visible:
+            with self.lock:
+                self.info.setdefault(info.name, info)
+
+    def clear(self):
+        with self.lock:
+            self.info.clear()
+
+class BrokerSnapshot:
+    # Account, open positions and quotes read from the terminal in three calls (account_info, positions_get and one
+    # symbols_get for every symbol), then kept current from order_send results for the rest of the cycle.
+    # Used from the MT5 executor thread only.
+    def __init__(self, symbol_cache, symbols=()):
+        self.symbol_cache = symbol_cache
+        self.symbols = list(dict.fromkeys(symbols))
+        self.account = None
+        self.positions = {}
+        self.ticks = {}
+        self.taken_at = None
+
+    @classmethod
+    def take(cls, symbols, symbol_cache):
+        snapshot = cls(symbol_cache, symbols)
+        snapshot.refresh()
+        return snapshot
+
+    def refresh(self):
+        start = time.perf_counter()
+        account_info = mt5.account_info()
+        if account_info is None:
+            logger.error(f"Failed to get account info, error code = {mt5.last_error()}")
+            self.account = None
+        else:
+            self.account = account_dict(account_info)
+        positions = mt5.positions_get()
+        if positions is None:
+            logger.error(f"Failed to get open positions, error code = {mt5.last_error()}")
+            positions = ()
+        self.positions = {position.ticket: position_dict(position) for position in positions}
+        self.taken_at = time.time()
+        self.refresh_ticks()
+        logger.debug(f"Broker snapshot with {len(self.positions)} positions and {len(self.ticks)} quotes "
+                     f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def refresh_ticks(self):
+        # Quotes for the configured symbols and every symbol with an open position, in one symbols_get call
+        symbols = list(dict.fromkeys(self.symbols + [trade['pair'] for trade in self.positions.values()]))
+        self.ticks = {}
+        if not symbols:
+            return
+        infos = mt5.symbols_get(group=','.join(symbols))
+        if infos is None:
+            logger.error(f"Failed to get quotes for {', '.join(symbols)}, error code = {mt5.last_error()}")
+            infos = ()
+        for info in infos:
+            self.symbol_cache.add(info)
+            # Symbols outside Market Watch come back without a quote and are read with symbol_info_tick when needed
+            if info.name in symbols and info.bid > 0 and info.ask > 0:
+                self.ticks[info.name] = {'bid': info.bid, 'ask': info.ask, 'time': info.time}
+
+    def tick(self, symbol):
+        if symbol not in self.ticks:
+            if self.symbol_cache.get(symbol) is None:
+                return None
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                logger.error(f"Failed to get tick for {symbol}, error code = {mt5.last_error()}")
+                return None
+            self.ticks[symbol] = {'bid': tick.bid, 'ask': tick.ask, 'time': tick.time}
+        return self.ticks[symbol]
+
+    def price(self, symbol, direction):
+        tick = self.tick(symbol)
+        if tick is None:
+            return None
+        return tick['ask'] if direction == 'buy' else tick['bid']
+
+    def open_trades(self):
+        return list(self.positions.values())
+
+    def position(self, ticket):
+        return self.positions.get(ticket)
+
+    def apply(self, request, result):
+        # The result carries the terminal's current bid/ask for the symbol, also on a requote
+        if result is None:
+            return
+        symbol = request['symbol']
+        if result.bid > 0 and result.ask > 0:
+            self.ticks[symbol] = {'bid': result.bid, 'ask': result.ask, 'time': int(time.time())}
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            return
+        if 'position' in request:
+            position = self.positions.get(request['position'])
+            if position is not None:
+                position['lots'] = round(position['lots'] - result.volume, 8)
+                if position['lots'] <= 0:
+                    del self.positions[request['position']]
+        else:
+            # A hedging account opens a position with the order's ticket; on a netting account the order changes the
+            # existing position instead, which the next snapshot picks up. Account figures are not updated here.
+            self.positions[result.order] = {
+                'order_id': result.order,
+                'pair': symbol,
+                'direction': 'buy' if request['type'] == mt5.ORDER_TYPE_BUY else 'sell',
+                'lots': result.volume,
+                'open_price': result.price,
+                'profit': 0.0,
+                'loss': 0.0,
+                'open_time': int(time.time())
+            }
@@ -0,0 +1,175 @@
+import os
+import copy
+import json
+import time
+import select
+import hashlib
+import threading
+from utils.logger import setup_logging
+
+logger = setup_logging('trading_app.log')
+
+def content_etag(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32]
+
+class FileConfigCache:
+    # config.json held in memory; the file is stat'ed at most every check_interval seconds and re-read only when it changed,
+    # so edits from other processes are picked up without re-reading it on every lookup
+    def __init__(self, path='config.json', check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.data = None
+        self.stat = None
+        self.checked = 0.0
+        self.version = 0
+        self.versions = {}
+        self.etag = None
+
+    def refresh(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.data is not None and now - self.checked < self.check_interval:
+                return
+            self.checked = now
+            st = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if not force and stat == self.stat:
+                return
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.stat = stat
+            self.apply(data)
+
+    def apply(self, data):
+        # Called with self.lock held; only keys whose value changed get a new version
+        previous = self.data or {}
+        changed = [key for key in set(previous) | set(data) if previous.get(key) != data.get(key)]
+        if self.data is not None and not changed:
+            return
+        self.version += 1
+        for key in changed:
+            self.versions[key] = self.version
+        self.data = data
+        self.etag = content_etag(data)
+        if changed and self.version > 1:
+            logger.info(f"Config version {self.version}: {', '.join(sorted(changed))} changed")
+
+    def get(self, key, default=None):
+        self.refresh()
+        with self.lock:
+            return copy.deepcopy(self.data.get(key, default))
+
+    def snapshot(self):
+        self.refresh()
+        with self.lock:
+            return copy.deepcopy(self.data)
+
+    def versioned(self):
+        self.refresh()
+        with self.lock:
+            return self.version, self.etag, copy.deepcopy(self.data)
+
+    def key_version(self, key):
+        self.refresh()
+        with self.lock:
+            return self.versions.get(key)
+
+    def save(self, config):
+        # Written to a temporary file and renamed, so readers never see a partial config.json
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(config, f, indent=4)
+        os.replace(tmp_path, self.path)
+        self.refresh(force=True)
+
+class DBConfigCache:
+    # Rows of the config table held in memory while a LISTEN connection is up; set_config in any process
+    # sends NOTIFY with the key, which drops it here. Without the listener every read goes to Postgres.
+    def __init__(self, db_pool, db_config, channel='config_changed', reconnect_delay=5):
+        self.db_pool = db_pool
+        self.db_config = db_config
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.values = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.listening = threading.Event()
+        self.stop_event = threading.Event()
+        self.counts = {'hits': 0, 'misses': 0, 'invalidations': 0, 'reconnects': 0}
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+        self.thread.start()
+
+    def get(self, key):
+        # Returns (value, version), or None when the key does not exist
+        with self.lock:
+            if self.listening.is_set() and key in self.values:
+                self.counts['hits'] += 1
+                return self.values[key]
+            self.counts['misses'] += 1
+            generation = self.generation
+        with self.db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value, version FROM config WHERE key = %s", (key,))
+            result = cursor.fetchone()
+        with self.lock:
+            # Not cached if an invalidation arrived while the query ran, since the result may predate it
+            if self.listening.is_set() and self.generation == generation:
+                self.values[key] = result
+        return result
+
+    def set(self, key, value):
+        # The NOTIFY is delivered on commit, so listeners never drop the key before the new value is visible
+        with self.db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO config (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE "
+                           "SET value = EXCLUDED.value, version = config.version + 1 RETURNING version", (key, value))
+            version = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, key))
+        self.invalidate(key)
+        return version
+
+    def invalidate(self, key=None):
+        with self.lock:
+            self.generation += 1
+            if key is None:
+                self.values.clear()
+            else:
+                self.values.pop(key, None)
+            self.counts['invalidations'] += 1
+
+    def listen(self):
+        # Imported here so that config.py, which only uses the file cache, does not need psycopg2
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        while not self.stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.db_config)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                # Anything cached before LISTEN was issued may have missed a notification
+                self.invalidate()
+                self.listening.set()
+                while not self.stop_event.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.invalidate(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Config listener error, caching disabled until reconnected: {e}")
+            finally:
+                self.listening.clear()
+                self.invalidate()
+                if conn is not None:
+                    conn.close()
+            self.counts['reconnects'] += 1
+            self.stop_event.wait(self.reconnect_delay)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, listening=self.listening.is_set(), cached=len(self.values))
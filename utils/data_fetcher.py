@@ -1,25 +1,56 @@
 import yfinance as yf
 import pandas as pd
 import talib
-from textblob import TextBlob
-import requests
-import numpy as np
 from utils.logger import setup_logging
+from utils.indicators import IndicatorCache, INDICATOR_COLUMNS
+from utils.bar_store import BarStore, flatten_columns, to_epoch_seconds
+from utils.sentiment import SentimentCache
+from utils.metrics import timed, track, returned_none
 
 logger = setup_logging('data_fetcher.log')
 
+indicator_cache = IndicatorCache(period=14, fast_period=12, slow_period=26, signal_period=9, nbdev=2)
+bar_store = BarStore()
+sentiment_cache = SentimentCache('YOUR_NEWSAPI_KEY', ttl=900)
+
+def fetch_bars(store, pair, interval='1h', history_seconds=31 * 86400, period='1mo'):
+    # Download only what is newer than the store, persist closed bars, and return stored history plus the forming bar.
+    # Pairs are fetched on a thread pool and yf.download keeps its results in module-global state, so each call
+    # goes through its own Ticker instead.
+    last = store.last_time(pair, interval)
+    ticker = yf.Ticker(pair + "=X")
+    if last is None:
+        # period only applies to an empty store; later calls start after the last stored bar
+        data = ticker.history(period=period, interval=interval)
+    else:
+        data = ticker.history(start=pd.Timestamp(last, unit='s', tz='UTC'), interval=interval)
+    data = flatten_columns(data)
+    if not data.empty:
+        store.append(pair, interval, store.closed_bars(data, interval))
+    history = store.tail(pair, interval, history_seconds)
+    if history.empty:
+        return data
+    forming = data[to_epoch_seconds(data.index) > store.last_time(pair, interval)] if not data.empty else data
+    return pd.concat([history, forming.reindex(columns=history.columns)])
+
+@timed('fetch_market_data', failed=returned_none)
 def fetch_market_data(pair):
     try:
-        data = yf.download(pair + "=X", period="1mo", interval="1h")
+        data = fetch_bars(bar_store, pair)
         if data.empty:
             logger.error(f"Error fetching market data for {pair}")
             return None
-        return get_technical_indicators(data)
+        return get_technical_indicators(data, pair)
     except Exception as e:
         logger.error(f"Error fetching market data for {pair}: {e}")
         return None
 
-def get_technical_indicators(data):
+@timed('get_technical_indicators')
+def get_technical_indicators(data, pair=None):
+    if pair is not None:
+        # Only bars that closed since the last call go through the per-pair engine
+        data[INDICATOR_COLUMNS] = indicator_cache.compute(pair, data)
+        return data
     data['SMA'] = talib.SMA(data['Close'], timeperiod=14)
     data['EMA'] = talib.EMA(data['Close'], timeperiod=14)
     data['MACD'], data['MACD_signal'], data['MACD_hist'] = talib.MACD(data['Close'], fastperiod=12, slowperiod=26, signalperiod=9)
@@ -29,13 +60,10 @@ def get_technical_indicators(data):
     return data
 
 def fetch_sentiment_analysis(pair):
-    try:
-        url = f'https://newsapi.org/v2/everything?q={pair}&apiKey=YOUR_NEWSAPI_KEY'
-        response = requests.get(url)
-        articles = response.json().get('articles', [])
-        sentiment_scores = [TextBlob(article['title']).sentiment.polarity for article in articles]
-        avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0
-        return avg_sentiment
-    except Exception as e:
-        logger.error(f"Error fetching sentiment data for {pair}: {e}")
-        return 0
+    with track('fetch_sentiment_analysis') as call:
+        try:
+            return sentiment_cache.pair_sentiment(pair)
+        except Exception as e:
+            call.failed = True
+            logger.error(f"Error fetching sentiment data for {pair}: {e}")
+            return 0
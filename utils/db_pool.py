@@ -0,0 +1,176 @@
+import time
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+from utils.logger import setup_logging
+
+logger = setup_logging('db_api.log')
+
+TRADE_COLUMNS = ['pair', 'volume', 'price', 'action', 'timestamp']
+
+class ConnectionPool:
+    # Connections are reused across requests; an idle one is pinged before reuse and replaced if the server dropped it
+    def __init__(self, db_config, minconn=1, maxconn=10, health_check_interval=30, timeout=10):
+        self.db_config = db_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.pool = None
+        self.last_used = {}
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.lock = threading.Lock()
+        self.counts = {'checkouts': 0, 'reconnects': 0, 'health_checks': 0}
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = pg_pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self.db_config)
+            return self.pool
+
+    def healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self.last_used.get(id(conn), 0) < self.health_check_interval:
+            return True
+        self.counts['health_checks'] += 1
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        pool = self.get_pool()
+        for _ in range(self.maxconn + 1):
+            conn = pool.getconn()
+            if self.healthy(conn):
+                return conn
+            self.counts['reconnects'] += 1
+            logger.warning("Discarding broken database connection")
+            pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("No healthy database connection available")
+
+    def putconn(self, conn, close=False):
+        self.last_used[id(conn)] = time.monotonic()
+        self.get_pool().putconn(conn, close=close or bool(conn.closed))
+
+    @contextmanager
+    def connection(self):
+        # Commits on success, rolls back on error; a connection that failed at the protocol level is not reused
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(f"Timed out after {self.timeout}s waiting for a database connection")
+        try:
+            conn = self.getconn()
+            self.counts['checkouts'] += 1
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            except BaseException:
+                # Includes GeneratorExit from a streamed response the client abandoned
+                conn.rollback()
+                raise
+            finally:
+                self.putconn(conn, close=broken)
+        finally:
+            self.slots.release()
+
+    def closeall(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.closeall()
+                self.pool = None
+
+    def stats(self):
+        return dict(self.counts, maxconn=self.maxconn)
+
+def trade_row(trade):
+    # Without a timestamp the server's NOW() is used, as for every trade logged before batching
+    return (trade['pair'], trade['volume'], trade['price'], trade['action'], trade.get('timestamp'))
+
+# A given timestamp goes through timestamptz, so an offset is honoured and the value is stored in the server's local
+# time like NOW() is; a missing one becomes NOW()
+TRADE_TEMPLATE = "(%s, %s, %s, %s, COALESCE(%s::timestamptz, NOW()))"
+
+def insert_trades(conn, rows, table='trades'):
+    # One round trip for the whole batch
+    with conn.cursor() as cursor:
+        execute_values(cursor, f"INSERT INTO {table} ({', '.join(TRADE_COLUMNS)}) VALUES %s", rows, template=TRADE_TEMPLATE,
+                       page_size=max(len(rows), 1))
+
+class WriteBehindBuffer:
+    # Trades are queued in memory and written in batches by a background thread, so the caller never waits on Postgres
+    def __init__(self, pool, flush_size=500, flush_interval=1.0, max_pending=100000, table='trades'):
+        self.pool = pool
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.table = table
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.counts = {'queued': 0, 'written': 0, 'flushes': 0, 'dropped': 0, 'errors': 0}
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def add(self, rows):
+        with self.lock:
+            self.pending.extend(rows)
+            self.counts['queued'] += len(rows)
+            overflow = len(self.pending) - self.max_pending
+            for _ in range(max(overflow, 0)):
+                self.pending.popleft()
+            if overflow > 0:
+                self.counts['dropped'] += overflow
+                logger.error(f"Write-behind buffer full, dropped {overflow} oldest trades")
+            if len(self.pending) >= self.flush_size:
+                self.wakeup.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            while True:
+                with self.lock:
+                    batch = [self.pending.popleft() for _ in range(min(self.flush_size, len(self.pending)))]
+                if not batch:
+                    return
+                try:
+                    with self.pool.connection() as conn:
+                        insert_trades(conn, batch, self.table)
+                except Exception as e:
+                    # Put the batch back in order and retry on the next interval
+                    with self.lock:
+                        self.pending.extendleft(reversed(batch))
+                    self.counts['errors'] += 1
+                    logger.error(f"Error flushing {len(batch)} trades: {e}")
+                    return
+                self.counts['written'] += len(batch)
+                self.counts['flushes'] += 1
+
+    def close(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        self.thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, pending=len(self.pending))
@@ -0,0 +1,244 @@
+import sys
+import time
+import fnmatch
+import itertools
+import threading
+from collections import Counter, namedtuple
+
+# In-memory stand-in for the MetaTrader5 package, so the trading code can run and be benchmarked without a terminal.
+# install() registers it as MetaTrader5 before utils.trading is imported; terminal holds the account, quotes and
+# positions, counts every call and can sleep `latency` seconds per call to stand in for the IPC round trip.
+
+# Values as defined by the MetaTrader5 package
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+TRADE_ACTION_DEAL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_POSITION_CLOSED = 10036
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_INIT = -10005
+
+AccountInfo = namedtuple('AccountInfo', 'login balance equity margin margin_free leverage currency')
+SymbolInfo = namedtuple('SymbolInfo', 'name visible select digits point trade_contract_size volume_min volume_max volume_step bid ask time')
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+TradePosition = namedtuple('TradePosition', 'ticket time type magic volume price_open sl tp price_current profit symbol comment')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask comment request_id retcode_external request')
+
+DEFAULT_QUOTES = {
+    'EURUSD': (1.08500, 5),
+    'GBPUSD': (1.27000, 5),
+    'USDJPY': (150.000, 3),
+    'AUDUSD': (0.66000, 5),
+    'USDCAD': (1.36000, 5),
+    'USDCHF': (0.88000, 5),
+    'NZDUSD': (0.61000, 5),
+    'EURGBP': (0.85500, 5),
+}
+
+class Terminal:
+    def __init__(self, balance=10000.0, quotes=None, spread_points=10, leverage=100, latency=0.0):
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.leverage = leverage
+        self.balance = balance
+        self.connected = False
+        self.error = (RES_S_OK, 'Success')
+        self.calls = Counter()
+        self.tickets = itertools.count(100000)
+        # Retcodes order_send returns instead of executing, one per call, for exercising error paths
+        self.forced_retcodes = []
+        self.symbols = {}
+        self.quotes = {}
+        self.positions = {}
+        for symbol, (price, digits) in (quotes or DEFAULT_QUOTES).items():
+            point = 10 ** -digits
+            self.symbols[symbol] = {'digits': digits, 'point': point, 'contract_size': 100000.0, 'visible': True}
+            self.quotes[symbol] = (price, price + spread_points * point, int(time.time()))
+
+    def call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fail(self, code, message):
+        self.error = (code, message)
+        return None
+
+    def profit(self, position):
+        bid, ask, _ = self.quotes[position['symbol']]
+        if position['type'] == POSITION_TYPE_BUY:
+            return (bid - position['price_open']) * position['volume'] * self.symbols[position['symbol']]['contract_size']
+        return (position['price_open'] - ask) * position['volume'] * self.symbols[position['symbol']]['contract_size']
+
+    def position_tuple(self, position):
+        bid, ask, _ = self.quotes[position['symbol']]
+        current = bid if position['type'] == POSITION_TYPE_BUY else ask
+        return TradePosition(position['ticket'], position['time'], position['type'], position['magic'], position['volume'],
+                             position['price_open'], position['sl'], position['tp'], current, round(self.profit(position), 2),
+                             position['symbol'], position['comment'])
+
+    def symbol_tuple(self, symbol):
+        spec = self.symbols[symbol]
+        bid, ask, quoted = self.quotes[symbol]
+        return SymbolInfo(symbol, spec['visible'], spec['visible'], spec['digits'], spec['point'], spec['contract_size'],
+                          0.01, 100.0, 0.01, bid, ask, quoted)
+
+    def margin(self):
+        return sum(p['volume'] * self.symbols[p['symbol']]['contract_size'] / self.leverage for p in self.positions.values())
+
+    def move(self, symbol, bid, ask=None):
+        # Moves the quote, which open positions on the symbol are valued at from then on
+        with self.lock:
+            previous_bid, previous_ask, _ = self.quotes[symbol]
+            self.quotes[symbol] = (bid, ask if ask is not None else bid + previous_ask - previous_bid, int(time.time()))
+
+terminal = Terminal()
+
+def reset(**kwargs):
+    global terminal
+    terminal = Terminal(**kwargs)
+    return terminal
+
+def install():
+    # Registers this module as MetaTrader5; anything importing MetaTrader5 afterwards gets the fake
+    module = sys.modules[__name__]
+    sys.modules['MetaTrader5'] = module
+    return module
+
+def initialize(*args, **kwargs):
+    terminal.call('initialize')
+    terminal.connected = True
+    terminal.error = (RES_S_OK, 'Success')
+    return True
+
+def shutdown():
+    terminal.call('shutdown')
+    terminal.connected = False
+    return None
+
+def last_error():
+    return terminal.error
+
+def account_info():
+    terminal.call('account_info')
+    with terminal.lock:
+        if not terminal.connected:
+            return terminal.fail(RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+        equity = terminal.balance + sum(terminal.profit(p) for p in terminal.positions.values())
+        margin = terminal.margin()
+        return AccountInfo(1, round(terminal.balance, 2), round(equity, 2), round(margin, 2), round(equity - margin, 2),
+                           terminal.leverage, 'USD')
+
+def positions_total():
+    terminal.call('positions_total')
+    with terminal.lock:
+        return len(terminal.positions)
+
+def positions_get(symbol=None, group=None, ticket=None):
+    terminal.call('positions_get')
+    with terminal.lock:
+        if not terminal.connected:
+            return terminal.fail(RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+        positions = [p for p in terminal.positions.values()
+                     if (ticket is None or p['ticket'] == ticket) and (symbol is None or p['symbol'] == symbol)
+                     and (group is None or matches_group(p['symbol'], group))]
+        return tuple(terminal.position_tuple(p) for p in positions)
+
+def matches_group(symbol, group):
+    # Comma-separated masks with * wildcards; a mask starting with ! excludes what it matches
+    included = False
+    for mask in group.split(','):
+        mask = mask.strip()
+        if mask.startswith('!'):
+            if fnmatch.fnmatchcase(symbol, mask[1:]):
+                return False
+        elif fnmatch.fnmatchcase(symbol, mask):
+            included = True
+    return included
+
+def symbols_get(group=None):
+    terminal.call('symbols_get')
+    with terminal.lock:
+        if not terminal.connected:
+            return terminal.fail(RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+        return tuple(terminal.symbol_tuple(s) for s in terminal.symbols if group is None or matches_group(s, group))
+
+def symbol_info(symbol):
+    terminal.call('symbol_info')
+    with terminal.lock:
+        if symbol not in terminal.symbols:
+            return terminal.fail(RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+        return terminal.symbol_tuple(symbol)
+
+def symbol_info_tick(symbol):
+    terminal.call('symbol_info_tick')
+    with terminal.lock:
+        if symbol not in terminal.quotes:
+            return terminal.fail(RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+        bid, ask, quoted = terminal.quotes[symbol]
+        return Tick(quoted, bid, ask, 0.0, 0, quoted * 1000, 6, 0.0)
+
+def symbol_select(symbol, enable=True):
+    terminal.call('symbol_select')
+    with terminal.lock:
+        if symbol not in terminal.symbols:
+            return False
+        terminal.symbols[symbol]['visible'] = enable
+        return True
+
+def order_send(request):
+    terminal.call('order_send')
+    with terminal.lock:
+        if not terminal.connected:
+            return terminal.fail(RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+        symbol = request.get('symbol')
+        if symbol not in terminal.quotes or request.get('action') != TRADE_ACTION_DEAL:
+            return result(TRADE_RETCODE_INVALID, request, comment='Invalid request')
+        bid, ask, _ = terminal.quotes[symbol]
+        if terminal.forced_retcodes:
+            return result(terminal.forced_retcodes.pop(0), request, bid=bid, ask=ask, comment='Forced')
+        volume = request.get('volume', 0)
+        if volume <= 0:
+            return result(TRADE_RETCODE_INVALID_VOLUME, request, bid=bid, ask=ask, comment='Invalid volume')
+        price = ask if request['type'] == ORDER_TYPE_BUY else bid
+        point = terminal.symbols[symbol]['point']
+        if abs(request.get('price', price) - price) > request.get('deviation', 0) * point + point / 2:
+            return result(TRADE_RETCODE_REQUOTE, request, bid=bid, ask=ask, comment='Requote')
+        ticket = next(terminal.tickets)
+        if 'position' in request:
+            position = terminal.positions.get(request['position'])
+            if position is None:
+                return result(TRADE_RETCODE_POSITION_CLOSED, request, bid=bid, ask=ask, comment='Position closed')
+            volume = min(volume, position['volume'])
+            terminal.balance += terminal.profit(position) * volume / position['volume']
+            position['volume'] = round(position['volume'] - volume, 2)
+            if position['volume'] <= 0:
+                del terminal.positions[position['ticket']]
+        else:
+            if terminal.margin() + volume * terminal.symbols[symbol]['contract_size'] / terminal.leverage > terminal.balance:
+                return result(TRADE_RETCODE_NO_MONEY, request, bid=bid, ask=ask, comment='No money')
+            # As on a hedging account, the position takes the ticket of the order that opened it
+            terminal.positions[ticket] = {
+                'ticket': ticket, 'time': int(time.time()), 'type': request['type'], 'magic': request.get('magic', 0),
+                'volume': volume, 'price_open': price, 'sl': request.get('sl', 0.0), 'tp': request.get('tp', 0.0),
+                'symbol': symbol, 'comment': request.get('comment', ''),
+            }
+        return result(TRADE_RETCODE_DONE, request, deal=ticket, order=ticket, volume=volume, price=price, bid=bid, ask=ask,
+                      comment='Request executed')
+
+def result(retcode, request, deal=0, order=0, volume=0.0, price=0.0, bid=0.0, ask=0.0, comment=''):
+    return OrderSendResult(retcode, deal, order, volume, price, bid, ask, comment, 0, 0, request)
@@ -0,0 +1,176 @@
+import copy
+import math
+from collections import deque
+import pandas as pd
+
+INDICATOR_COLUMNS = ['SMA', 'EMA', 'MACD', 'MACD_signal', 'MACD_hist', 'RSI', 'BB_upper', 'BB_middle', 'BB_lower', 'ATR']
+
+EPSILON = 1e-14
+
+class SeededEMA:
+    # Exponential average seeded with the simple mean of its first `period` inputs, as talib does
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed = []
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+                self.seed = None
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+class IndicatorEngine:
+    # Running state for SMA/EMA/MACD/RSI/BBANDS/ATR; each update is O(1) in the history length
+    def __init__(self, period=14, fast_period=12, slow_period=26, signal_period=9, nbdev=2):
+        self.period = period
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.nbdev = nbdev
+        self.count = 0
+        self.last_time = None
+
+        self.window = deque()
+        self.window_sum = 0.0
+        self.window_sumsq = 0.0
+
+        self.ema = SeededEMA(period)
+
+        # talib starts both MACD averages on the bar where the slow one is first defined
+        self.closes = deque(maxlen=slow_period)
+        self.fast_ema = None
+        self.slow_ema = None
+        self.fast_k = 2.0 / (fast_period + 1)
+        self.slow_k = 2.0 / (slow_period + 1)
+        self.signal = SeededEMA(signal_period)
+
+        self.prev_close = None
+        self.gain = 0.0
+        self.loss = 0.0
+        self.tr = 0.0
+        self.atr = None
+
+    def update(self, high, low, close):
+        n = self.period
+        nan = math.nan
+        out = dict.fromkeys(INDICATOR_COLUMNS, nan)
+
+        self.window.append(close)
+        self.window_sum += close
+        self.window_sumsq += close * close
+        if len(self.window) > n:
+            old = self.window.popleft()
+            self.window_sum -= old
+            self.window_sumsq -= old * old
+        if len(self.window) == n:
+            mean = self.window_sum / n
+            variance = self.window_sumsq / n - mean * mean
+            band = self.nbdev * math.sqrt(variance) if variance > 0 else 0.0
+            out['SMA'] = out['BB_middle'] = mean
+            out['BB_upper'] = mean + band
+            out['BB_lower'] = mean - band
+
+        ema = self.ema.update(close)
+        if ema is not None:
+            out['EMA'] = ema
+
+        self.closes.append(close)
+        if self.slow_ema is None:
+            if len(self.closes) == self.slow_period:
+                self.slow_ema = sum(self.closes) / self.slow_period
+                self.fast_ema = sum(list(self.closes)[-self.fast_period:]) / self.fast_period
+        else:
+            self.slow_ema = (close - self.slow_ema) * self.slow_k + self.slow_ema
+            self.fast_ema = (close - self.fast_ema) * self.fast_k + self.fast_ema
+        if self.slow_ema is not None:
+            macd = self.fast_ema - self.slow_ema
+            signal = self.signal.update(macd)
+            if signal is not None:
+                out['MACD'] = macd
+                out['MACD_signal'] = signal
+                out['MACD_hist'] = macd - signal
+
+        if self.prev_close is not None:
+            diff = close - self.prev_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            if self.count <= n:
+                self.gain += gain
+                self.loss += loss
+                self.tr += tr
+                if self.count == n:
+                    self.gain /= n
+                    self.loss /= n
+                    self.atr = self.tr / n
+            else:
+                self.gain = (self.gain * (n - 1) + gain) / n
+                self.loss = (self.loss * (n - 1) + loss) / n
+                self.atr = (self.atr * (n - 1) + tr) / n
+            if self.count >= n:
+                total = self.gain + self.loss
+                out['RSI'] = 100.0 * self.gain / total if abs(total) > EPSILON else 0.0
+                out['ATR'] = self.atr
+        self.prev_close = close
+
+        self.count += 1
+        return out
+
+    def peek(self, high, low, close):
+        # Values for a bar that is still forming, without committing it to the state
+        return copy.deepcopy(self).update(high, low, close)
+
+    def warm_up(self, data):
+        rows = [self.update(h, l, c) for h, l, c in zip(data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float), data['Close'].to_numpy(dtype=float))]
+        if len(data):
+            self.last_time = data.index[-1]
+        return pd.DataFrame(rows, index=data.index, columns=INDICATOR_COLUMNS)
+
+class IndicatorCache:
+    # One engine per pair, fed only the bars that closed since the previous call
+    def __init__(self, **params):
+        self.params = params
+        self.engines = {}
+        self.history = {}
+
+    def compute(self, pair, data):
+        if len(data) == 0:
+            return pd.DataFrame(columns=INDICATOR_COLUMNS, index=data.index)
+        closed = data.iloc[:-1]
+        engine = self.engines.get(pair)
+        history = self.history.get(pair)
+
+        if engine is None or engine.last_time is None or engine.last_time not in closed.index or history.index[0] > closed.index[0]:
+            engine = IndicatorEngine(**self.params)
+            history = engine.warm_up(closed)
+        else:
+            new_bars = closed.loc[closed.index > engine.last_time]
+            if len(new_bars):
+                rows = [engine.update(h, l, c) for h, l, c in zip(new_bars['High'].to_numpy(dtype=float), new_bars['Low'].to_numpy(dtype=float), new_bars['Close'].to_numpy(dtype=float))]
+                engine.last_time = new_bars.index[-1]
+                history = pd.concat([history, pd.DataFrame(rows, index=new_bars.index, columns=INDICATOR_COLUMNS)])
+            history = history.loc[history.index >= closed.index[0]] if len(closed) else history
+
+        self.engines[pair] = engine
+        self.history[pair] = history
+
+        last = data.iloc[-1]
+        current = engine.peek(float(last['High']), float(last['Low']), float(last['Close']))
+        current = pd.DataFrame([current], index=data.index[-1:], columns=INDICATOR_COLUMNS)
+        return pd.concat([history, current]).reindex(data.index)
+
+    def reset(self, pair=None):
+        if pair is None:
+            self.engines.clear()
+            self.history.clear()
+        else:
+            self.engines.pop(pair, None)
+            self.history.pop(pair, None)
+
+def compute_indicators(data, **params):
+    return IndicatorEngine(**params).warm_up(data)
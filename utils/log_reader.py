@@ -0,0 +1,134 @@
+import os
+import re
+import json
+import time
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+LEVEL_PATTERN = re.compile(rb' - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ')
+
+def line_level(line):
+    # Plain lines use setup_logging's "time - LEVEL - message" format; JSON lines carry a "level" field
+    match = LEVEL_PATTERN.search(line)
+    if match:
+        return match.group(1).decode()
+    if line.startswith(b'{'):
+        try:
+            return json.loads(line).get('level')
+        except (ValueError, AttributeError):
+            return None
+    return None
+
+class LineFilter:
+    def __init__(self, level=None, pattern=None):
+        self.min_level = LEVELS[level.upper()] if level else None
+        self.pattern = re.compile(pattern) if pattern else None
+
+    def __call__(self, head, text):
+        if self.min_level is not None and LEVELS.get(line_level(head), 0) < self.min_level:
+            return False
+        return self.pattern is None or self.pattern.search(text) is not None
+
+def decode(lines):
+    return '\n'.join(line.decode('utf-8', errors='replace') for line in lines)
+
+def read_backward(f, end, block_size):
+    # Yields (offset, line) from end towards the start of the file, newest first, one block read at a time
+    position = end
+    remainder = b''
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        chunk = f.read(size) + remainder
+        lines = chunk.split(b'\n')
+        remainder = lines.pop(0)
+        offset = position + len(remainder) + 1
+        starts = []
+        for line in lines:
+            starts.append(offset)
+            offset += len(line) + 1
+        for start, line in zip(reversed(starts), reversed(lines)):
+            yield start, line
+    yield 0, remainder
+
+def tail(path, lines=200, before=None, level=None, pattern=None, block_size=65536, max_scan_bytes=32 * 1024 * 1024):
+    # Returns up to `lines` entries ending before byte offset `before` (EOF by default), oldest first, and the
+    # offset to pass as `before` for the previous page (None at the start of the file). Continuation lines
+    # without a level, such as tracebacks, stay with the entry they belong to.
+    line_filter = LineFilter(level, pattern)
+    entries = []
+    cursor = None
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if before is None else min(int(before), size)
+        pending = []
+        for offset, line in read_backward(f, end, block_size):
+            if offset == end and not line:
+                continue
+            pending.append(line)
+            # Continuation lines are held until the line that starts their entry is reached
+            if line_level(line) is None and offset > 0 and end - offset <= max_scan_bytes:
+                continue
+            entry = decode(reversed(pending))
+            head = pending[-1]
+            pending = []
+            cursor = offset
+            if line_filter(head, entry):
+                entries.append({'offset': offset, 'level': line_level(head), 'text': entry})
+                if len(entries) >= lines:
+                    break
+            if end - offset > max_scan_bytes:
+                break
+    entries.reverse()
+    return entries, cursor or None
+
+def follow(path, offset=None, level=None, pattern=None, poll_interval=1.0, heartbeat=15.0, stop=None):
+    # Yields new complete lines as (offset, text) and None as a heartbeat. A replaced (rotated) or truncated file is
+    # reopened from the start once what was left in the old one has been read.
+    line_filter = LineFilter(level, pattern)
+    f = open(path, 'rb')
+    try:
+        inode = os.fstat(f.fileno()).st_ino
+        size = os.fstat(f.fileno()).st_size
+        position = size if offset is None or int(offset) > size else int(offset)
+        f.seek(position)
+        partial = b''
+        included = None
+        last_sent = time.monotonic()
+        while stop is None or not stop():
+            data = f.read()
+            if data:
+                lines = (partial + data).split(b'\n')
+                partial = lines.pop()
+                for line in lines:
+                    start = position
+                    position += len(line) + 1
+                    if not line:
+                        continue
+                    text = decode([line])
+                    # A continuation line follows the decision made for the line that started its entry
+                    if line_level(line) is None and included is not None:
+                        keep = included
+                    else:
+                        keep = included = line_filter(line, text)
+                    if keep:
+                        last_sent = time.monotonic()
+                        yield start, text
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is not None and (st.st_ino != inode or st.st_size < position + len(partial)):
+                f.close()
+                f = open(path, 'rb')
+                inode = os.fstat(f.fileno()).st_ino
+                position = 0
+                partial = b''
+                continue
+            if time.monotonic() - last_sent >= heartbeat:
+                last_sent = time.monotonic()
+                yield None
+            time.sleep(poll_interval)
+    finally:
+        f.close()
@@ -1 +1 @@
-import loggingdef setup_logging(log_file):    logging.basicConfig(filename=log_file, level=logging.INFO,                         format='%(asctime)s - %(levelname)s - %(message)s')    return logging
\ No newline at end of file
+import osimport jsonimport timeimport queueimport atexitimport loggingimport threadingfrom collections import OrderedDictfrom multiprocessing import util as multiprocessing_utilfrom logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandlerLOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'# Defaults for every log file; each can be overridden per setup_logging call or through the environmentLOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 7))LOG_ROTATE_WHEN = os.environ.get('LOG_ROTATE_WHEN', 'midnight')LOG_JSON = os.environ.get('LOG_JSON', '').lower() in ('1', 'true', 'yes')LOG_REPEAT_INTERVAL = float(os.environ.get('LOG_REPEAT_INTERVAL', 300))# How often counts of suppressed repeats are checked for a window that has endedREPEAT_FLUSH_PERIOD = 10# absolute log file path -> (logger, queue handler, listener)pipelines = {}pipelines_lock = threading.Lock()flusher = Noneflusher_stop = threading.Event()class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):    # Rolls over at the time boundary or once the file would pass max_bytes, whichever comes first    def __init__(self, filename, max_bytes, when, backup_count):        super().__init__(filename, when=when, backupCount=backup_count, encoding='utf-8', delay=True)        self.max_bytes = max_bytes    def shouldRollover(self, record):        if super().shouldRollover(record):            return True        if not self.max_bytes:            return False        if self.stream is None:            self.stream = self._open()        self.stream.seek(0, 2)        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes    def rotation_filename(self, default_name):        # Several size rollovers in one period would otherwise overwrite each other's file        name = super().rotation_filename(default_name)        number = 1        candidate = name        while os.path.exists(candidate):            candidate = f'{name}.{number}'            number += 1        return candidateclass LightQueueHandler(QueueHandler):    # The stock prepare() formats and copies every record on the caller's thread; here only the message and    # any traceback are resolved, and the listener thread does the formatting    def prepare(self, record):        record.msg = record.getMessage()        record.args = None        if record.exc_info:            record.exc_text = logging.Formatter().formatException(record.exc_info)            record.exc_info = None        return recordclass JsonFormatter(logging.Formatter):    def format(self, record):        entry = {            'time': self.formatTime(record),            'level': record.levelname,            'logger': record.name,            'message': record.getMessage(),        }        if record.exc_info:            entry['exc_info'] = self.formatException(record.exc_info)        elif record.exc_text:            entry['exc_info'] = record.exc_text        return json.dumps(entry)class RepeatFilter(logging.Filter):    # The first occurrence of a message is logged; identical ones within `interval` seconds are only counted,    # and the next one after that is logged with "(repeated N times in the last Xs)". Counts whose window ends    # without another occurrence are handed back by flush() as a summary record.    def __init__(self, interval=300, max_messages=1000):        super().__init__()        self.interval = interval        self.max_messages = max_messages        self.seen = OrderedDict()        self.lock = threading.Lock()    def filter(self, record):        if not self.interval:            return True        message = record.getMessage()        key = (record.levelno, message)        now = time.monotonic()        with self.lock:            seen = self.seen.get(key)            if seen is not None and now - seen[0] < self.interval:                seen[1] += 1                seen[2] = record                return False            self.seen[key] = [now, 0, None]            self.seen.move_to_end(key)            while len(self.seen) > self.max_messages:                self.seen.popitem(last=False)        if seen is not None and seen[1]:            message = f"{message} (repeated {seen[1]} times in the last {now - seen[0]:.0f}s)"        record.msg = message        record.args = None        return True    def flush(self, force=False):        # Summary records for the messages whose window has ended (every pending one with force), last occurrence first        now = time.monotonic()        records = []        with self.lock:            for key, seen in list(self.seen.items()):                if not force and now - seen[0] < self.interval:                    continue                del self.seen[key]                if seen[1]:                    record = logging.makeLogRecord(seen[2].__dict__)                    record.msg = f"{key[1]} (repeated {seen[1]} times in the last {now - seen[0]:.0f}s)"                    record.args = None                    records.append(record)        return recordsdef setup_logging(log_file, level=logging.INFO, json_format=None, max_bytes=None, backup_count=None, when=None, repeat_interval=None):    # Callers only put records on a queue; one listener thread per file formats and writes them    path = os.path.abspath(log_file)    with pipelines_lock:        if path in pipelines:            return pipelines[path][0]        handler = SizedTimedRotatingFileHandler(            log_file,            max_bytes=LOG_MAX_BYTES if max_bytes is None else max_bytes,            when=when or LOG_ROTATE_WHEN,            backup_count=LOG_BACKUP_COUNT if backup_count is None else backup_count,        )        handler.setFormatter(JsonFormatter() if (LOG_JSON if json_format is None else json_format) else logging.Formatter(LOG_FORMAT))        log_queue = queue.SimpleQueue()        queue_handler = LightQueueHandler(log_queue)        queue_handler.addFilter(RepeatFilter(LOG_REPEAT_INTERVAL if repeat_interval is None else repeat_interval))        listener = QueueListener(log_queue, handler)        listener.start()        # Keyed on the full path, so files with the same name in different directories get their own logger        logger = logging.getLogger(f'bwtrade.{path}')        logger.setLevel(level)        logger.addHandler(queue_handler)        logger.propagate = False        pipelines[path] = (logger, queue_handler, listener)        start_flusher()        return loggerdef flush_repeats(force=False):    with pipelines_lock:        queue_handlers = [queue_handler for _, queue_handler, _ in pipelines.values()]    for queue_handler in queue_handlers:        for repeat_filter in queue_handler.filters:            if isinstance(repeat_filter, RepeatFilter):                for record in repeat_filter.flush(force):                    queue_handler.enqueue(queue_handler.prepare(record))def flush_loop():    while not flusher_stop.wait(REPEAT_FLUSH_PERIOD):        flush_repeats()def start_flusher():    global flusher    if flusher is None or not flusher.is_alive():        flusher = threading.Thread(target=flush_loop, name='log-repeat-flush', daemon=True)        flusher.start()def stop_logging():    # Writes out pending repeat counts and drains every queue to disk; registered to run at exit    flusher_stop.set()    flush_repeats(force=True)    with pipelines_lock:        for _, _, listener in pipelines.values():            if listener._thread is not None:                listener.stop()def restart_after_fork():    # A forked child inherits the queues but not the listener threads, so each pipeline gets a fresh queue and thread    global pipelines_lock, flusher_stop    pipelines_lock = threading.Lock()    flusher_stop = threading.Event()    for path, (logger, queue_handler, listener) in list(pipelines.items()):        log_queue = queue.SimpleQueue()        queue_handler.queue = log_queue        for repeat_filter in queue_handler.filters:            if isinstance(repeat_filter, RepeatFilter):                repeat_filter.lock = threading.Lock()        listener = QueueListener(log_queue, *listener.handlers)        listener.start()        pipelines[path] = (logger, queue_handler, listener)    if pipelines:        start_flusher()def finalize_in_child(_):    # multiprocessing children leave through os._exit, which skips atexit    multiprocessing_util.Finalize(None, stop_logging, exitpriority=-100)atexit.register(stop_logging)# fork, and so register_at_fork, only exists on POSIX; Windows children are spawned and set up their own loggingif hasattr(os, 'register_at_fork'):    os.register_at_fork(after_in_child=restart_after_fork)multiprocessing_util.register_after_fork(stop_logging, finalize_in_child)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import json
+import numpy as np
+
+# Forward pass for the LSTM -> LSTM -> Dense models in models/, so serving does not need TensorFlow.
+# Weights carry a leading group axis: one model is a group of 1, stacked models run in a single pass.
+
+def sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'sigmoid': sigmoid,
+    'relu': lambda x: np.maximum(x, 0),
+    'linear': lambda x: x,
+}
+WEIGHT_NAMES = {
+    'LSTM': ['kernel', 'recurrent_kernel', 'bias'],
+    'Dense': ['kernel', 'bias'],
+}
+
+def numpy_path(keras_path):
+    return os.path.splitext(keras_path)[0] + '.npz'
+
+def lstm(x, params, spec):
+    # x is (group, batch, steps, features); gates are packed i, f, c, o as in Keras
+    kernel, recurrent_kernel, bias = params['kernel'], params['recurrent_kernel'], params['bias']
+    activation = ACTIVATIONS[spec['activation']]
+    recurrent_activation = ACTIVATIONS[spec['recurrent_activation']]
+    units = recurrent_kernel.shape[1]
+    group, batch, steps, _ = x.shape
+    z_x = x @ kernel[:, None] + bias[:, None, None]
+    h = np.zeros((group, batch, units), dtype=x.dtype)
+    c = np.zeros((group, batch, units), dtype=x.dtype)
+    sequence = []
+    for t in range(steps):
+        z = z_x[:, :, t] + h @ recurrent_kernel
+        i = recurrent_activation(z[..., :units])
+        f = recurrent_activation(z[..., units:2 * units])
+        g = activation(z[..., 2 * units:3 * units])
+        o = recurrent_activation(z[..., 3 * units:])
+        c = f * c + i * g
+        h = o * activation(c)
+        if spec['return_sequences']:
+            sequence.append(h)
+    return np.stack(sequence, axis=2) if spec['return_sequences'] else h
+
+def dense(x, params, spec):
+    kernel, bias = params['kernel'], params['bias']
+    extra = (1,) * (x.ndim - 3)
+    y = x @ kernel.reshape(kernel.shape[:1] + extra + kernel.shape[1:]) + bias.reshape(bias.shape[:1] + extra + (1,) + bias.shape[1:])
+    return ACTIVATIONS[spec['activation']](y)
+
+LAYERS = {'LSTM': lstm, 'Dense': dense}
+
+class NumpyLSTMModel:
+    def __init__(self, input_shape, specs, params):
+        self.input_shape = (None,) + tuple(input_shape)
+        self.specs = specs
+        self.params = params
+        self.weights = [w for layer in params for w in layer.values()]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            architecture = json.loads(str(archive['architecture']))
+            params = [{name: archive[f'{i}.{name}'][None] for name in WEIGHT_NAMES[spec['type']]}
+                      for i, spec in enumerate(architecture['layers'])]
+        return cls(architecture['input_shape'], architecture['layers'], params)
+
+    @classmethod
+    def stack(cls, models):
+        # Same-architecture models side by side, so a /predict_batch group is one set of matmuls
+        first = models[0]
+        params = [{name: np.concatenate([model.params[i][name] for model in models]) for name in layer}
+                  for i, layer in enumerate(first.params)]
+        return cls(first.input_shape[1:], first.specs, params)
+
+    def signature(self):
+        return (self.input_shape, tuple((spec['type'], json.dumps(spec, sort_keys=True), tuple(w.shape[1:] for w in layer.values()))
+                                        for spec, layer in zip(self.specs, self.params)))
+
+    def forward(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        for spec, layer in zip(self.specs, self.params):
+            x = LAYERS[spec['type']](x, layer, spec)
+        return x
+
+    def predict(self, x, verbose=0):
+        # Same call as keras Model.predict for a single model: (batch, steps, features) -> (batch, outputs)
+        return self.forward(np.asarray(x)[None])[0]
+
+    def predict_group(self, xs):
+        # For stacked models: (group, batch, steps, features) -> (group, batch, outputs)
+        return self.forward(xs)
+
+def export_model(model, path):
+    specs = []
+    arrays = {}
+    for i, layer in enumerate(model.layers):
+        kind = layer.__class__.__name__
+        config = layer.get_config()
+        if kind not in LAYERS:
+            raise ValueError(f"Unsupported layer {kind} in {model.name}")
+        if kind == 'LSTM' and (config.get('go_backwards') or config.get('stateful')):
+            raise ValueError(f"Unsupported LSTM options in {model.name}")
+        spec = {'type': kind, 'activation': config['activation']}
+        if kind == 'LSTM':
+            spec.update({'recurrent_activation': config['recurrent_activation'], 'return_sequences': config['return_sequences']})
+        if spec['activation'] not in ACTIVATIONS or spec.get('recurrent_activation', 'sigmoid') not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation in {model.name}: {spec}")
+        weights = layer.get_weights()
+        if not config.get('use_bias', True):
+            weights.append(np.zeros(weights[-1].shape[-1], dtype=weights[-1].dtype))
+        for name, weight in zip(WEIGHT_NAMES[kind], weights):
+            arrays[f'{i}.{name}'] = weight
+        specs.append(spec)
+    arrays['architecture'] = np.array(json.dumps({'input_shape': list(model.input_shape[1:]), 'layers': specs}))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return NumpyLSTMModel.load(path)
+
+def max_difference(model, numpy_model, inputs):
+    expected = model.predict(inputs, verbose=0)
+    actual = numpy_model.predict(inputs)
+    scale = np.maximum(np.abs(expected), 1.0)
+    return float(np.max(np.abs(expected - actual) / scale))
+
+def export_keras_file(keras_path, path=None, inputs=None, tolerance=1e-4):
+    # Imported here so that only exporting, never serving, pulls in TensorFlow
+    from keras.models import load_model
+    model = load_model(keras_path)
+    path = path or numpy_path(keras_path)
+    numpy_model = export_model(model, path)
+    if inputs is None:
+        inputs = np.random.default_rng(0).uniform(0.5, 2.0, size=(64,) + tuple(model.input_shape[1:]))
+    difference = max_difference(model, numpy_model, inputs)
+    if difference > tolerance:
+        os.remove(path)
+        raise ValueError(f"NumPy export of {keras_path} differs from Keras by {difference:.2e}")
+    return numpy_model, difference
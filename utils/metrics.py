@@ -0,0 +1,127 @@
+import time
+import bisect
+import threading
+from functools import wraps
+
+# Upper bounds in seconds of the latency histogram buckets, from a cached lookup to a slow download
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class StageMetrics:
+    def __init__(self, buckets=BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def start(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finish(self, seconds, failed):
+        with self.lock:
+            self.in_flight -= 1
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+            self.calls += 1
+            if failed:
+                self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.total, self.calls, self.errors, self.in_flight
+
+class StageCall:
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.failed = False
+
+    def __enter__(self):
+        self.stage = self.registry.stage(self.name)
+        self.thread_id = threading.get_ident()
+        self.thread_stages = self.registry.active.setdefault(self.thread_id, [])
+        self.thread_stages.append(self.name)
+        self.stage.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stage.finish(time.perf_counter() - self.start, self.failed or exc_type is not None)
+        self.thread_stages.pop()
+        if not self.thread_stages:
+            self.registry.active.pop(self.thread_id, None)
+        return False
+
+class MetricsRegistry:
+    # Latency histogram, call and error counters and an in-flight gauge per stage of the trading path
+    def __init__(self, prefix='bwtrade'):
+        self.prefix = prefix
+        self.stages = {}
+        self.lock = threading.Lock()
+        # Stages each thread is inside, innermost last, for the sampling profiler to attribute its samples
+        self.active = {}
+
+    def stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            with self.lock:
+                stage = self.stages.setdefault(name, StageMetrics())
+        return stage
+
+    def track(self, name):
+        # Context manager timing one call of a stage; setting failed on it counts the call as an error without raising
+        return StageCall(self, name)
+
+    def timed(self, name, failed=None):
+        # Decorator form of track(); failed(result) marks a returned value as an error, for functions that log and
+        # return None instead of raising
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with StageCall(self, name) as call:
+                    result = fn(*args, **kwargs)
+                    call.failed = failed is not None and failed(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def active_stages(self):
+        return {thread_id: list(stages) for thread_id, stages in list(self.active.items()) if stages}
+
+    def render(self):
+        # Prometheus text exposition format
+        name = f'{self.prefix}_stage_duration_seconds'
+        lines = [f'# HELP {name} Time spent in each stage of the trading path.', f'# TYPE {name} histogram']
+        counters = {'calls': [], 'errors': [], 'in_flight': []}
+        with self.lock:
+            stages = sorted(self.stages.items())
+        for stage, stage_metrics in stages:
+            counts, total, calls, errors, in_flight = stage_metrics.snapshot()
+            cumulative = 0
+            for bound, count in zip(stage_metrics.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {calls}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {calls}')
+            counters['calls'].append(f'{self.prefix}_stage_calls_total{{stage="{stage}"}} {calls}')
+            counters['errors'].append(f'{self.prefix}_stage_errors_total{{stage="{stage}"}} {errors}')
+            counters['in_flight'].append(f'{self.prefix}_stage_in_flight{{stage="{stage}"}} {in_flight}')
+        lines += [f'# HELP {self.prefix}_stage_calls_total Calls per stage.', f'# TYPE {self.prefix}_stage_calls_total counter']
+        lines += counters['calls']
+        lines += [f'# HELP {self.prefix}_stage_errors_total Calls per stage that raised or returned a failure.',
+                  f'# TYPE {self.prefix}_stage_errors_total counter']
+        lines += counters['errors']
+        lines += [f'# HELP {self.prefix}_stage_in_flight Calls per stage currently running.', f'# TYPE {self.prefix}_stage_in_flight gauge']
+        lines += counters['in_flight']
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+timed = metrics.timed
+track = metrics.track
+
+def returned_none(result):
+    return result is None
@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.lstm_numpy import NumpyLSTMModel, export_keras_file
+from utils.logger import setup_logging
+
+logger = setup_logging('trading_app.log')
+
+def model_nbytes(model):
+    return sum(int(np.prod(w.shape)) * np.dtype(w.dtype).itemsize for w in model.weights)
+
+class ModelRegistry:
+    def __init__(self, currency_pairs, model_dir='models', max_models=None, max_bytes=None, reload_interval=5):
+        self.currency_pairs = list(currency_pairs)
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.reload_interval = reload_interval
+        self.models = OrderedDict()
+        self.info = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watcher = None
+        if reload_interval:
+            self.watcher = threading.Thread(target=self.watch, daemon=True)
+            self.watcher.start()
+
+    def model_path(self, pair):
+        return os.path.join(self.model_dir, f'lstm_model_{pair}.npz')
+
+    def keras_path(self, pair):
+        return os.path.join(self.model_dir, f'lstm_model_{pair}.keras')
+
+    def exists(self, pair):
+        return os.path.exists(self.model_path(pair)) or os.path.exists(self.keras_path(pair))
+
+    def source_mtime(self, pair):
+        return max(os.path.getmtime(path) for path in (self.model_path(pair), self.keras_path(pair)) if os.path.exists(path))
+
+    def add_pairs(self, currency_pairs):
+        with self.lock:
+            self.currency_pairs.extend([pair for pair in currency_pairs if pair not in self.currency_pairs])
+
+    def available_pairs(self):
+        return [pair for pair in self.currency_pairs if self.exists(pair)]
+
+    def get(self, pair, default=None):
+        with self.lock:
+            model = self.models.get(pair)
+            if model is not None:
+                self.models.move_to_end(pair)
+                self.hits += 1
+                return model
+            self.misses += 1
+
+        with self.load_lock:
+            # Another thread may have loaded it while we waited
+            with self.lock:
+                model = self.models.get(pair)
+            if model is not None:
+                return model
+            if not self.exists(pair):
+                return default
+            model = self.load(pair)
+        return model if model is not None else default
+
+    def __contains__(self, pair):
+        return pair in self.models or self.exists(pair)
+
+    def load(self, pair):
+        path = self.model_path(pair)
+        try:
+            mtime = self.source_mtime(pair)
+            start = time.perf_counter()
+            if os.path.exists(path) and os.path.getmtime(path) >= mtime:
+                model = NumpyLSTMModel.load(path)
+            else:
+                # Missing or older than the .keras file: export once, which is the only time TensorFlow is imported
+                logger.warning(f"Exporting {self.keras_path(pair)} to {path}, run export_models.py after training")
+                model, _ = export_keras_file(self.keras_path(pair), path)
+                mtime = self.source_mtime(pair)
+            load_time = time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Error loading model for {pair}: {e}")
+            return None
+
+        nbytes = model_nbytes(model)
+        with self.lock:
+            info = self.info.setdefault(pair, {'loads': 0})
+            info.update({'mtime': mtime, 'load_time': load_time, 'bytes': nbytes})
+            info['loads'] += 1
+            self.models[pair] = model
+            self.models.move_to_end(pair)
+            self.evict()
+        logger.info(f"Loaded model for {pair} in {load_time:.3f}s ({nbytes} bytes)")
+        return model
+
+    def evict(self):
+        # Called with self.lock held; never evicts the most recently used model
+        while len(self.models) > 1 and (
+                (self.max_models and len(self.models) > self.max_models) or
+                (self.max_bytes and self.bytes_held() > self.max_bytes)):
+            pair, _ = self.models.popitem(last=False)
+            self.info[pair]['bytes'] = 0
+            self.evictions += 1
+            logger.info(f"Evicted model for {pair}")
+
+    def bytes_held(self):
+        return sum(self.info[pair]['bytes'] for pair in self.models)
+
+    def watch(self):
+        while not self.stop_event.wait(self.reload_interval):
+            with self.lock:
+                loaded = [(pair, self.info[pair]['mtime']) for pair in self.models]
+            for pair, mtime in loaded:
+                try:
+                    changed = self.source_mtime(pair) != mtime
+                except (OSError, ValueError):
+                    continue
+                if changed:
+                    with self.load_lock:
+                        if self.load(pair) is not None:
+                            self.reloads += 1
+                            logger.info(f"Reloaded model for {pair} after file change")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'loaded': len(self.models),
+                'available': len(self.available_pairs()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'reloads': self.reloads,
+                'bytes': self.bytes_held(),
+                'max_models': self.max_models,
+                'max_bytes': self.max_bytes,
+                'models': {
+                    pair: {
+                        'loaded': pair in self.models,
+                        'bytes': info['bytes'],
+                        'load_time': round(info['load_time'], 4),
+                        'loads': info['loads'],
+                    }
+                    for pair, info in self.info.items()
+                },
+            }
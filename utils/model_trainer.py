@@ -1 +1 @@
-import numpy as npimport pandas as pdfrom keras.models import load_model, Sequentialfrom keras.layers import LSTM, Dense, Inputimport xgboost as xgbfrom sklearn.model_selection import train_test_splitfrom sklearn.metrics import accuracy_scorefrom utils.logger import setup_logginglogger = setup_logging('model_trainer.log')def load_models(currency_pairs):    models = {}    for pair in currency_pairs:        model_path = f'models/lstm_model_{pair}.keras'        try:            models[pair] = load_model(model_path)            logger.info(f"Loaded model for {pair}")        except Exception as e:            logger.error(f"Error loading model for {pair}: {e}")    return modelsdef prepare_prediction_data(data):    return np.array(data).reshape(1, -1, 1)def predict(models, pair, data):    model = models.get(pair)    if not model:        logger.error(f"No model found for {pair}")        return None    return model.predict(data)def train_xgboost_model(data):    features = ['SMA', 'EMA', 'MACD', 'MACD_signal', 'RSI', 'BB_upper', 'BB_lower', 'ATR']    X = data[features].shift().dropna()    y = (data['Close'].shift(-1) > data['Close']).astype(int).iloc[:-1]    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)    model = xgb.XGBClassifier()    model.fit(X_train, y_train)        y_pred = model.predict(X_test)    accuracy = accuracy_score(y_test, y_pred)    logger.info(f"XGBoost model accuracy: {accuracy}")    return modeldef create_dataset(data, look_back=1):    X, Y = [], []    for i in range(len(data) - look_back):        a = data[i:(i + look_back), 0]        X.append(a)        Y.append(data[i + look_back, 0])    return np.array(X), np.array(Y)def train_lstm_model(pair, data):    look_back = 10    X, Y = create_dataset(data, look_back)    train_size = int(len(X) * 0.8)    X_train, X_test = X[:train_size], X[train_size:]    Y_train, Y_test = Y[:train_size], Y[train_size:]    X_train = np.reshape(X_train, (X_train.shape[0], X_train.shape[1], 1))    X_test = np.reshape(X_test, (X_test.shape[0], X_test.shape[1], 1))    model = Sequential()    model.add(Input(shape=(look_back, 1)))    model.add(LSTM(50, return_sequences=True))    model.add(LSTM(50))    model.add(Dense(1))    model.compile(loss='mean_squared_error', optimizer='adam')    model.fit(X_train, Y_train, epochs=20, batch_size=1, verbose=2)    model_path = f'models/lstm_model_{pair}.keras'    model.save(model_path)    logger.info(f"Model for {pair} saved at {model_path}")
\ No newline at end of file
+import threadingfrom collections import OrderedDictimport numpy as npfrom utils.logger import setup_loggingfrom utils.lstm_numpy import NumpyLSTMModel, export_model, numpy_pathfrom utils.model_registry import ModelRegistryfrom utils.xgb_store import XGBModelStorefrom utils.metrics import timed, returned_nonelogger = setup_logging('model_trainer.log')# Stacked weights for /predict_batch, keyed by the pairs of each group; least recently used groups are dropped# past MAX_GROUP_MODELSMAX_GROUP_MODELS = 32group_models = OrderedDict()group_models_lock = threading.Lock()def load_models(currency_pairs, max_models=None, max_bytes=None, reload_interval=5):    # Models load on first use; see ModelRegistry for eviction and hot reload    return ModelRegistry(currency_pairs, max_models=max_models, max_bytes=max_bytes, reload_interval=reload_interval)def load_xgboost_models(currency_pairs, refresh_interval=3600, drift_threshold=0.1, max_trees=300):    return XGBModelStore(currency_pairs, refresh_interval=refresh_interval, drift_threshold=drift_threshold, max_trees=max_trees).load_all()def prepare_prediction_data(data):    data = np.array(data, dtype=float)    if data.ndim == 3:        return data    return data.reshape(1, -1, 1)@timed('lstm_predict', failed=returned_none)def predict(models, pair, data):    model = models.get(pair)    if not model:        logger.error(f"No model found for {pair}")        return None    return model.predict(data)def model_signature(model):    return model.signature()def get_group_model(members):    key = tuple(pair for pair, _, _ in members)    models = tuple(model for _, model, _ in members)    with group_models_lock:        cached = group_models.get(key)        # Rebuilt whenever one of the member models was evicted or reloaded. The entry holds the member models        # themselves, so a new model can never be mistaken for one whose memory it reused.        if cached is None or any(old is not new for old, new in zip(cached[0], models)):            cached = (models, NumpyLSTMModel.stack(list(models)))            group_models[key] = cached        group_models.move_to_end(key)        while len(group_models) > MAX_GROUP_MODELS:            group_models.popitem(last=False)    return cached[1]# Counted as an error when any pair could not be predicted@timed('lstm_predict', failed=lambda result: bool(result[1]))def predict_batch(models, windows):    predictions = {}    errors = {}    groups = {}    for pair, data in windows.items():        model = models.get(pair)        if model is None:            errors[pair] = f"No model found for {pair}"            continue        input_data = prepare_prediction_data(data)        if input_data.shape[1:] != tuple(model.input_shape[1:]):            errors[pair] = f"Expected input shape {tuple(model.input_shape[1:])} for {pair}, got {input_data.shape[1:]}"            continue        groups.setdefault(model_signature(model), []).append((pair, model, input_data))    # One forward pass per architecture: pairs sharing a layout run through their stacked weights together    for members in groups.values():        if len(members) == 1:            pair, model, input_data = members[0]            outputs = [model.predict(input_data)]        else:            outputs = get_group_model(members).predict_group(np.stack([input_data for _, _, input_data in members]))        for (pair, _, _), output in zip(members, outputs):            predictions[pair] = float(output[0][0])    return predictions, errorsdef create_dataset(data, look_back=1):    X, Y = [], []    for i in range(len(data) - look_back):        a = data[i:(i + look_back), 0]        X.append(a)        Y.append(data[i + look_back, 0])    return np.array(X), np.array(Y)def train_lstm_model(pair, data):    # Training is the only part of this module that needs TensorFlow    from keras.models import Sequential    from keras.layers import LSTM, Dense, Input    look_back = 10    X, Y = create_dataset(data, look_back)    train_size = int(len(X) * 0.8)    X_train, Y_train = X[:train_size], Y[:train_size]    X_train = np.reshape(X_train, (X_train.shape[0], X_train.shape[1], 1))    model = Sequential()    model.add(Input(shape=(look_back, 1)))    model.add(LSTM(50, return_sequences=True))    model.add(LSTM(50))    model.add(Dense(1))    model.compile(loss='mean_squared_error', optimizer='adam')    model.fit(X_train, Y_train, epochs=20, batch_size=1, verbose=2)    model_path = f'models/lstm_model_{pair}.keras'    model.save(model_path)    export_model(model, numpy_path(model_path))    logger.info(f"Model for {pair} saved at {model_path}")
\ No newline at end of file
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+from utils.logger import setup_logging
+
+logger = setup_logging('trading_app.log')
+
+SS = '{urn:schemas-microsoft-com:office:spreadsheet}'
+OFFICE = '{urn:schemas-microsoft-com:office:office}'
+
+# Report columns kept as their own store columns; any other column is a tester input and goes into params
+COLUMNS = {
+    'Symbol': 'symbol',
+    'Pass': 'pass_number',
+    'Result': 'result',
+    'Profit': 'profit',
+    'Expected Payoff': 'expected_payoff',
+    'Profit Factor': 'profit_factor',
+    'Recovery Factor': 'recovery_factor',
+    'Sharpe Ratio': 'sharpe_ratio',
+    'Custom': 'custom',
+    'Equity DD %': 'equity_dd',
+    'Trades': 'trades',
+}
+METRICS = ['result', 'profit', 'expected_payoff', 'profit_factor', 'recovery_factor', 'sharpe_ratio', 'custom', 'equity_dd', 'trades']
+PASS_COLUMNS = ['report_id', 'symbol', 'pass_number'] + METRICS + ['params']
+
+# Query arguments and the condition each adds
+FILTERS = {
+    'min_result': 'result >= ?',
+    'min_profit_factor': 'profit_factor >= ?',
+    'min_expected_payoff': 'expected_payoff >= ?',
+    'min_recovery_factor': 'recovery_factor >= ?',
+    'min_sharpe_ratio': 'sharpe_ratio >= ?',
+    'max_drawdown': 'equity_dd <= ?',
+    'min_trades': 'trades >= ?',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime_ns INTEGER,
+                                    title TEXT, deposit TEXT, passes INTEGER, ingested_at REAL);
+CREATE TABLE IF NOT EXISTS passes (report_id INTEGER, symbol TEXT, pass_number INTEGER, result REAL, profit REAL,
+                                   expected_payoff REAL, profit_factor REAL, recovery_factor REAL, sharpe_ratio REAL,
+                                   custom REAL, equity_dd REAL, trades INTEGER, params TEXT);
+CREATE INDEX IF NOT EXISTS passes_report_idx ON passes (report_id);
+CREATE INDEX IF NOT EXISTS passes_symbol_result_idx ON passes (symbol, result DESC);
+-- Ranked queries with a LIMIT walk this index and stop after enough matches instead of sorting every match
+CREATE INDEX IF NOT EXISTS passes_result_idx ON passes (result DESC);
+CREATE INDEX IF NOT EXISTS passes_profit_factor_idx ON passes (profit_factor);
+CREATE INDEX IF NOT EXISTS passes_equity_dd_idx ON passes (equity_dd);
+-- Best pass per symbol by Result, rebuilt in the same transaction as every ingest
+CREATE TABLE IF NOT EXISTS best_passes (symbol TEXT PRIMARY KEY, report_id INTEGER, pass_number INTEGER, result REAL,
+                                        profit REAL, expected_payoff REAL, profit_factor REAL, recovery_factor REAL,
+                                        sharpe_ratio REAL, custom REAL, equity_dd REAL, trades INTEGER, params TEXT);
+"""
+
+class ReportTarget:
+    # Parser target for a tester optimization report (Excel 2003 XML). Rows are collected as value lists as the
+    # parser reaches them, without building a tree; DocumentProperties (Title, Deposit, ...) go into properties.
+    def __init__(self, properties):
+        self.properties = properties
+        self.rows = []
+        self.values = None
+        self.text = None
+        self.number = False
+        self.filled = False
+
+    def start(self, tag, attrib):
+        if tag == f'{SS}Row':
+            self.values = []
+        elif tag == f'{SS}Cell':
+            self.filled = False
+            # ss:Index is the 1-based column of a cell that follows skipped empty cells
+            index = attrib.get(f'{SS}Index')
+            if index:
+                self.values.extend([None] * (int(index) - 1 - len(self.values)))
+        elif tag == f'{SS}Data' or tag.startswith(OFFICE):
+            self.text = []
+            self.number = attrib.get(f'{SS}Type') == 'Number'
+
+    def data(self, text):
+        if self.text is not None:
+            self.text.append(text)
+
+    def end(self, tag):
+        if tag == f'{SS}Data':
+            text = ''.join(self.text)
+            self.values.append(None if not text else float(text) if self.number else text)
+            self.text = None
+            self.filled = True
+        elif tag == f'{SS}Cell':
+            # A cell without Data is empty
+            if not self.filled:
+                self.values.append(None)
+        elif tag == f'{SS}Row':
+            self.rows.append(self.values)
+        elif tag.startswith(OFFICE) and self.text is not None:
+            text = ''.join(self.text).strip()
+            if text:
+                self.properties[tag[len(OFFICE):]] = text
+            self.text = None
+
+    def close(self):
+        pass
+
+def report_rows(path, properties=None, chunk_size=1 << 16):
+    # Streams the rows of a tester optimization report as dicts keyed by the header row. The file is fed to the
+    # parser in chunks and rows are handed on after each one, so memory stays flat however many passes it holds.
+    target = ReportTarget({} if properties is None else properties)
+    parser = ET.XMLParser(target=target)
+    header = None
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            rows, target.rows = target.rows, []
+            for values in rows:
+                if header is None:
+                    header = [str(value) for value in values]
+                    if 'Symbol' not in header:
+                        raise ValueError(f"{path} is not an optimization report: no Symbol column in {header}")
+                    continue
+                yield dict(zip(header, values))
+            if not chunk:
+                return
+
+def pass_row(report_id, values):
+    row = {column: values.get(field) for field, column in COLUMNS.items()}
+    params = {field: value for field, value in values.items() if field not in COLUMNS}
+    for column in ['pass_number', 'trades']:
+        if row[column] is not None:
+            row[column] = int(row[column])
+    row['report_id'] = report_id
+    row['params'] = json.dumps(params) if params else None
+    return tuple(row[column] for column in PASS_COLUMNS)
+
+def pass_dict(row):
+    record = dict(row)
+    record['params'] = json.loads(record['params']) if record.get('params') else {}
+    return record
+
+class OptimizerStore:
+    # Every pass of every ingested optimization report in one SQLite file, indexed for ranking and filter queries.
+    # The database version (PRAGMA user_version) goes up with each ingest; best() results are cached per version,
+    # so readers in other processes see new reports on their next call without re-querying unchanged data. The cache
+    # keeps the cache_size most recently used queries, since clients choose the filters.
+    def __init__(self, path='data/optimizer.db', batch_size=1000, cache_size=128):
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.cache_version = None
+        self.ready = False
+
+    def setup(self):
+        # Schema and WAL mode (which sticks to the database file) once per store, not for every new thread;
+        # WAL lets the HTTP threads read while a report is being ingested
+        with self.lock:
+            if self.ready:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+            finally:
+                conn.close()
+            self.ready = True
+
+    def connection(self):
+        # One connection per thread
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            if not self.ready:
+                self.setup()
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
+
+    def version(self):
+        return self.connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def ingest(self, paths, force=False):
+        # Reports already ingested with the same size and mtime are skipped; a changed report replaces its passes.
+        # All files go in one transaction, with best_passes rebuilt once at the end.
+        conn = self.connection()
+        counts = {}
+        with conn:
+            for path in paths:
+                counts[path] = self.ingest_report(conn, os.path.abspath(path), force)
+            if any(count is not None for count in counts.values()):
+                self.rebuild_best(conn)
+                # Fresh statistics, so the planner weighs the metric indexes against the result ordering
+                conn.execute("ANALYZE")
+                conn.execute(f"PRAGMA user_version = {self.version() + 1}")
+        return counts
+
+    def ingest_report(self, conn, path, force):
+        st = os.stat(path)
+        existing = conn.execute("SELECT id, size, mtime_ns FROM reports WHERE path = ?", (path,)).fetchone()
+        if existing is not None and not force and (existing['size'], existing['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            return None
+        if existing is not None:
+            report_id = existing['id']
+            conn.execute("DELETE FROM passes WHERE report_id = ?", (report_id,))
+        else:
+            report_id = conn.execute("INSERT INTO reports (path) VALUES (?)", (path,)).lastrowid
+
+        start = time.perf_counter()
+        insert = f"INSERT INTO passes ({', '.join(PASS_COLUMNS)}) VALUES ({', '.join('?' * len(PASS_COLUMNS))})"
+        properties = {}
+        count = 0
+        batch = []
+        for values in report_rows(path, properties):
+            batch.append(pass_row(report_id, values))
+            if len(batch) >= self.batch_size:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        conn.executemany(insert, batch)
+        count += len(batch)
+        conn.execute("UPDATE reports SET size = ?, mtime_ns = ?, title = ?, deposit = ?, passes = ?, ingested_at = ? WHERE id = ?",
+                     (st.st_size, st.st_mtime_ns, properties.get('Title'), properties.get('Deposit'), count, time.time(), report_id))
+        logger.info(f"Ingested {count} passes from {path} in {time.perf_counter() - start:.2f}s")
+        return count
+
+    def rebuild_best(self, conn):
+        columns = ', '.join(PASS_COLUMNS)
+        conn.execute("DELETE FROM best_passes")
+        conn.execute(f"""
+            INSERT INTO best_passes ({columns})
+            SELECT {columns} FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY result DESC, profit_factor DESC) AS rank
+                FROM passes WHERE symbol IS NOT NULL
+            ) WHERE rank = 1""")
+
+    def query(self, table='passes', symbols=None, order_by='result', limit=None, **filters):
+        # filters are FILTERS keys; order_by any metric, descending except equity_dd where lower is better
+        if order_by not in METRICS:
+            raise ValueError(f"Cannot order by {order_by}")
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        clauses = []
+        params = []
+        if symbols:
+            clauses.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+        for name, value in filters.items():
+            if value is not None:
+                clauses.append(FILTERS[name])
+                params.append(value)
+        sql = f"SELECT * FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by} {'ASC' if order_by == 'equity_dd' else 'DESC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [pass_dict(row) for row in self.connection().execute(sql, params)]
+
+    def best(self, **kwargs):
+        # Best pass per symbol, optionally filtered; returns (version, rows) for the caller's ETag
+        version = self.version()
+        key = tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in kwargs.items()))
+        with self.lock:
+            if version != self.cache_version:
+                self.cache = OrderedDict()
+                self.cache_version = version
+            rows = self.cache.get(key)
+            if rows is not None:
+                self.cache.move_to_end(key)
+        if rows is None:
+            rows = self.query('best_passes', **kwargs)
+            with self.lock:
+                if version == self.cache_version:
+                    self.cache[key] = rows
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+        return version, rows
+
+    def reports(self):
+        return [dict(row) for row in self.connection().execute("SELECT * FROM reports ORDER BY id")]
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
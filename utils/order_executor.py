@@ -0,0 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class OrderExecutor:
+    # All MetaTrader5 calls go through one thread; order placement is spaced by min_interval seconds
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
+        self.last_order = 0.0
+
+    def call(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs).result()
+
+    def place(self, fn, *args, **kwargs):
+        return self.executor.submit(self.rate_limited, fn, args, kwargs)
+
+    def rate_limited(self, fn, args, kwargs):
+        wait = self.last_order + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.last_order = time.monotonic()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
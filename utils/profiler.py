@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from utils.logger import setup_logging
+from utils.metrics import metrics
+
+logger = setup_logging('trading_app.log')
+
+def folded_stack(frame):
+    stack = []
+    while frame is not None:
+        stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return stack[::-1]
+
+class CycleProfiler:
+    # Opt-in sampling profiler for trading cycles. While a cycle runs, a thread samples every `interval` seconds the
+    # stack of each thread that is inside a tracked stage, prefixed with the stages it is in. The cycle that is the
+    # slowest so far has its samples written to output_dir in folded-stack format ("stage;frame;frame count"), which
+    # flamegraph.pl and speedscope read.
+    def __init__(self, enabled=False, interval=0.005, output_dir='logs', file_name='slowest_cycle.folded'):
+        self.enabled = enabled
+        self.interval = interval
+        self.path = os.path.join(output_dir, file_name)
+        self.slowest = 0.0
+
+    @contextmanager
+    def cycle(self, name='trading_cycle'):
+        # The cycle is always timed as a stage of its own; sampling only happens when enabled
+        with metrics.track(name):
+            if not self.enabled:
+                yield
+                return
+            samples = Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(target=self.sample, args=(samples, stop), daemon=True)
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                yield
+            finally:
+                duration = time.perf_counter() - start
+                stop.set()
+                sampler.join()
+                if duration > self.slowest:
+                    self.slowest = duration
+                    self.dump(name, samples, duration)
+
+    def sample(self, samples, stop):
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, stages in metrics.active_stages().items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own:
+                    continue
+                samples[(tuple(stages), tuple(folded_stack(frame)))] += 1
+
+    def dump(self, name, samples, duration):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for (stages, stack), count in samples.most_common():
+                    f.write(f"{';'.join(stages + stack)} {count}\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error writing cycle profile to {self.path}: {e}")
+            return
+        # Share of the sampled thread time spent in each innermost stage
+        stages = Counter()
+        for (thread_stages, _), count in samples.items():
+            stages[thread_stages[-1]] += count
+        total = sum(stages.values()) or 1
+        shares = ', '.join(f"{stage} {count * 100 / total:.0f}%" for stage, count in stages.most_common(5))
+        logger.info(f"Slowest {name} so far took {duration:.2f}s, {sum(samples.values())} samples in {self.path} ({shares})")
@@ -0,0 +1,127 @@
+import math
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from utils.logger import setup_logging
+from utils.bar_store import INTERVAL_SECONDS
+
+logger = setup_logging('trading_app.log')
+
+def interval_seconds(interval):
+    # A timeframe name such as '1h', or a number of seconds
+    return INTERVAL_SECONDS[interval] if isinstance(interval, str) else float(interval)
+
+def next_boundary(now, interval, offset=0.0):
+    # The first time after now that is a whole number of intervals since the epoch, plus offset; with a timeframe's
+    # interval that is the next bar close
+    return (math.floor((now - offset) / interval) + 1) * interval + offset
+
+class Job:
+    def __init__(self, name, fn, interval, offset=0.0, max_lag=None, history=100):
+        self.name = name
+        self.fn = fn
+        self.interval = interval_seconds(interval)
+        self.offset = offset
+        # A run that cannot start within max_lag of its deadline is skipped; half the interval by default
+        self.max_lag = max_lag if max_lag is not None else self.interval / 2
+        self.deadline = next_boundary(time.time(), self.interval, offset)
+        self.lags = deque(maxlen=history)
+        self.counts = {'runs': 0, 'skipped': 0, 'overruns': 0, 'errors': 0}
+        self.last_duration = None
+        self.max_duration = 0.0
+
+    def skip_to(self, now):
+        # Moves the deadline past now, counting the deadlines in between as skipped
+        deadline = next_boundary(now, self.interval, self.offset)
+        skipped = max(0, round((deadline - self.deadline) / self.interval) - 1)
+        self.deadline = deadline
+        return skipped
+
+    def stats(self):
+        lags = list(self.lags)
+        mean = sum(lags) / len(lags) if lags else None
+        return dict(
+            self.counts,
+            interval=self.interval,
+            offset=self.offset,
+            next_run=datetime.fromtimestamp(self.deadline, timezone.utc).isoformat(),
+            # Lag is how long after its deadline a run started; jitter is the standard deviation of the lag
+            last_lag_ms=round(lags[-1] * 1000, 3) if lags else None,
+            mean_lag_ms=round(mean * 1000, 3) if lags else None,
+            max_lag_ms=round(max(lags) * 1000, 3) if lags else None,
+            jitter_ms=round(math.sqrt(sum((lag - mean) ** 2 for lag in lags) / len(lags)) * 1000, 3) if lags else None,
+            last_duration=round(self.last_duration, 3) if self.last_duration is not None else None,
+            max_duration=round(self.max_duration, 3),
+        )
+
+class Scheduler:
+    # Runs every job on one thread, so no two jobs ever overlap; jobs due at the same moment run in the order they
+    # were added. The thread sleeps until the earliest deadline rather than polling.
+    def __init__(self, max_sleep=60.0):
+        # Sleeps are capped so that a change of the wall clock is noticed within max_sleep seconds
+        self.max_sleep = max_sleep
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def add(self, name, fn, interval, offset=0.0, max_lag=None):
+        job = Job(name, fn, interval, offset, max_lag)
+        with self.lock:
+            self.jobs.append(job)
+        logger.info(f"Scheduled {name} every {job.interval:g}s at offset {offset:g}s, first run at "
+                    f"{datetime.fromtimestamp(job.deadline, timezone.utc).isoformat()}")
+        return job
+
+    def next_job(self):
+        with self.lock:
+            return min(self.jobs, key=lambda job: (job.deadline, self.jobs.index(job)))
+
+    def run(self, job):
+        now = time.time()
+        lag = now - job.deadline
+        if lag > job.max_lag:
+            # Held up past max_lag by another job or a suspended process: the stale cycles are dropped, not run late,
+            # and the latest deadline is kept if it is still within max_lag
+            latest = next_boundary(now, job.interval, job.offset) - job.interval
+            if now - latest > job.max_lag:
+                latest += job.interval
+            skipped = round((latest - job.deadline) / job.interval)
+            job.deadline = latest
+            job.counts['skipped'] += skipped
+            logger.warning(f"Skipped {skipped} {job.name} cycle(s), {lag:.1f}s past the deadline")
+            if latest > now:
+                return
+            lag = now - latest
+        job.lags.append(lag)
+        start = time.perf_counter()
+        try:
+            job.fn()
+        except Exception as e:
+            job.counts['errors'] += 1
+            logger.error(f"Error in scheduled job {job.name}: {e}")
+        duration = time.perf_counter() - start
+        job.counts['runs'] += 1
+        job.last_duration = duration
+        job.max_duration = max(job.max_duration, duration)
+        # Deadlines that passed while the job ran are overruns: skipped rather than run back to back
+        overruns = job.skip_to(max(time.time(), job.deadline))
+        if overruns:
+            job.counts['overruns'] += overruns
+            logger.warning(f"{job.name} took {duration:.1f}s and overran {overruns} cycle(s) of {job.interval:g}s")
+
+    def run_forever(self):
+        while not self.stop_event.is_set():
+            job = self.next_job()
+            wait = job.deadline - time.time()
+            if wait > 0:
+                self.stop_event.wait(min(wait, self.max_sleep))
+                continue
+            self.run(job)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            return {job.name: job.stats() for job in self.jobs}
@@ -0,0 +1,103 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+import numpy as np
+import requests
+from textblob import TextBlob
+
+NEWS_API_URL = 'https://newsapi.org/v2/everything'
+
+def currency_legs(pair):
+    return pair[:3], pair[3:6]
+
+def headline_hash(title):
+    return hashlib.sha1(title.encode('utf-8')).hexdigest()
+
+class SentimentCache:
+    # Headlines are fetched per currency and shared by every pair containing it; polarity is memoized per headline
+    def __init__(self, api_key, url=NEWS_API_URL, ttl=900, failure_ttl=60, max_headlines=10000, timeout=10):
+        self.api_key = api_key
+        self.url = url
+        self.ttl = ttl
+        # A failed request is cached as no headlines for failure_ttl, so an outage is not retried on every lookup
+        self.failure_ttl = failure_ttl
+        self.max_headlines = max_headlines
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.queries = {}
+        self.polarity = OrderedDict()
+        self.lock = threading.Lock()
+        self.query_locks = defaultdict(threading.Lock)
+        self.counts = defaultdict(int)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] += n
+
+    def headlines(self, query):
+        with self.lock:
+            query_lock = self.query_locks[query]
+        # Concurrent lookups of the same currency wait for one request instead of each sending their own
+        with query_lock:
+            cached = self.queries.get(query)
+            if cached is not None and cached[0] > time.monotonic():
+                self.count('query_hits')
+                return cached[1]
+            self.count('query_misses')
+            self.count('outbound_calls')
+            try:
+                response = self.session.get(self.url, params={'q': query, 'apiKey': self.api_key}, timeout=self.timeout)
+                response.raise_for_status()
+                titles = [article['title'] for article in response.json().get('articles', []) if article.get('title')]
+            except Exception:
+                self.count('query_failures')
+                self.queries[query] = (time.monotonic() + self.failure_ttl, [])
+                raise
+            self.queries[query] = (time.monotonic() + self.ttl, titles)
+            return titles
+
+    def score(self, titles):
+        # Only headlines not seen before go through TextBlob, in one pass
+        hashes = [headline_hash(title) for title in titles]
+        # Cached values are read in the same critical section as the membership check, so an eviction by another
+        # thread before the second one cannot lose them
+        with self.lock:
+            scores = {}
+            new = {}
+            for h, title in zip(hashes, titles):
+                if h in self.polarity:
+                    scores[h] = self.polarity[h]
+                    self.polarity.move_to_end(h)
+                else:
+                    new[h] = title
+            self.counts['polarity_hits'] += len(hashes) - len(new)
+            self.counts['polarity_misses'] += len(new)
+        computed = {h: TextBlob(title).sentiment.polarity for h, title in new.items()}
+        scores.update(computed)
+        with self.lock:
+            self.polarity.update(computed)
+            while len(self.polarity) > self.max_headlines:
+                self.polarity.popitem(last=False)
+        return [scores[h] for h in hashes]
+
+    def pair_sentiment(self, pair):
+        self.count('pair_lookups')
+        titles = {}
+        for currency in currency_legs(pair):
+            for title in self.headlines(currency):
+                titles.setdefault(headline_hash(title), title)
+        scores = self.score(list(titles.values()))
+        return np.mean(scores) if scores else 0
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            counts['cached_headlines'] = len(self.polarity)
+        query_total = counts.get('query_hits', 0) + counts.get('query_misses', 0)
+        polarity_total = counts.get('polarity_hits', 0) + counts.get('polarity_misses', 0)
+        counts['query_hit_rate'] = counts.get('query_hits', 0) / query_total if query_total else 0.0
+        counts['polarity_hit_rate'] = counts.get('polarity_hits', 0) / polarity_total if polarity_total else 0.0
+        # One request per pair per cycle is what the uncached path would have sent
+        counts['calls_saved'] = counts.get('pair_lookups', 0) - counts.get('outbound_calls', 0)
+        return counts
@@ -1 +1 @@
-import MetaTrader5 as mt5import loggingimport timefrom utils.logger import setup_loggingfrom utils.data_fetcher import fetch_market_data, fetch_sentiment_analysisfrom utils.model_trainer import train_xgboost_modellogger = setup_logging('trading.log')def initialize_mt5():    if not mt5.initialize():        logger.error("initialize() failed, error code = %s", mt5.last_error())        return False    return Truedef get_account_state():    account_info = mt5.account_info()    if account_info is None:        logger.error("Failed to get account info, error code = %s", mt5.last_error())        return None    return {        'balance': account_info.balance,        'equity': account_info.equity,        'margin': account_info.margin,        'free_margin': account_info.margin_free    }def get_open_trades():    open_positions = mt5.positions_get()    if open_positions is None:        logger.error("Failed to get open positions, error code = %s", mt5.last_error())        return []    open_trades = []    for position in open_positions:        open_trades.append({            'order_id': position.ticket,            'pair': position.symbol,            'direction': 'buy' if position.type == mt5.ORDER_TYPE_BUY else 'sell',            'lots': position.volume,            'open_price': position.price_open,            'profit': position.profit,            'loss': position.price_open - position.price_current if position.type == mt5.ORDER_TYPE_BUY else position.price_current - position.price_open,            'open_time': position.time        })    return open_tradesdef place_order(pair, direction, lot_size):    symbol_info = mt5.symbol_info(pair)    if symbol_info is None:        logger.error(f"Failed to get symbol info for {pair}, error code = %s", mt5.last_error())        return None    if not symbol_info.visible:        if not mt5.symbol_select(pair, True):            logger.error(f"Failed to select symbol {pair}, error code = %s", mt5.last_error())            return None    point = symbol_info.point    price = mt5.symbol_info_tick(pair).ask if direction == 'buy' else mt5.symbol_info_tick(pair).bid    request = {        "action": mt5.TRADE_ACTION_DEAL,        "symbol": pair,        "volume": lot_size,        "type": mt5.ORDER_TYPE_BUY if direction == 'buy' else mt5.ORDER_TYPE_SELL,        "price": price,        "sl": price - 100 * point if direction == 'buy' else price + 100 * point,        "tp": price + 100 * point if direction == 'buy' else price - 100 * point,        "deviation": 10,        "magic": 234000,        "comment": "Python script order",        "type_time": mt5.ORDER_TIME_GTC,        "type_filling": mt5.ORDER_FILLING_IOC,    }    result = mt5.order_send(request)    if result.retcode != mt5.TRADE_RETCODE_DONE:        logger.error(f"Failed to place order, error code = %s", mt5.last_error())        return None    return resultdef close_order(order_id):    position = mt5.positions_get(ticket=order_id)    if position is None or len(position) == 0:        logger.error(f"Failed to find position with ticket {order_id}, error code = %s", mt5.last_error())        return None    position = position[0]    price = mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask    request = {        "action": mt5.TRADE_ACTION_DEAL,        "symbol": position.symbol,        "volume": position.volume,        "type": mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,        "position": position.ticket,        "price": price,        "deviation": 10,        "magic": 234000,        "comment": "Python script order close",        "type_time": mt5.ORDER_TIME_GTC,        "type_filling": mt5.ORDER_FILLING_IOC,    }    result = mt5.order_send(request)    if result.retcode != mt5.TRADE_RETCODE_DONE:        logger.error(f"Failed to close order, error code = %s", mt5.last_error())        return None    return resultdef execute_trades(models, currency_pairs, account_state):    equity = account_state['equity']    for pair in currency_pairs:        try:            model = models.get(pair)            if model:                data = fetch_market_data(pair)                if data is None:                    continue                sentiment_score = fetch_sentiment_analysis(pair)                prediction_input = data[['SMA', 'EMA', 'MACD', 'MACD_signal', 'RSI', 'BB_upper', 'BB_lower']].tail(10).values.reshape(1, 10, 7)                prediction = model.predict(prediction_input)                xgb_model = train_xgboost_model(data)                xgb_prediction = xgb_model.predict(prediction_input)                trend = data['SMA'].iloc[-1] > data['EMA'].iloc[-1]                volatile = data['ATR'].iloc[-1] > data['ATR'].mean() * 1.5                if sentiment_score > 0 and trend and not volatile:                    trade_direction = 'buy' if prediction > 0.5 and xgb_prediction > 0.5 else 'sell'                else:                    trade_direction = 'sell' if prediction > 0.5 and xgb_prediction > 0.5 else 'buy'                lot_size = (equity * 0.01) / 100000                lot_size = max(min(lot_size, 100), 0.01)                if account_state['free_margin'] > lot_size * 100000 / 50:                    open_trades = get_open_trades()                    if len(open_trades) < 5:                        order_result = place_order(pair, trade_direction, lot_size)                        if order_result:                            logger.info(f"Placed {trade_direction} order for {pair} with lot size {lot_size}: {order_result}")                        else:                            logger.error(f"Failed to place {trade_direction} order for {pair} with lot size {lot_size}")                    else:                        logger.warning(f"Maximum open trades reached for {pair}")                else:                    logger.warning(f"Insufficient free margin to place new trade for {pair}")        except Exception as e:            logger.error(f"Error trading {pair}: {e}")        time.sleep(5)def close_open_trades():    open_trades = get_open_trades()    for trade in open_trades:        try:            if trade['profit'] >= 100 or trade['loss'] <= -50:                close_order(trade['order_id'])                logger.info(f"Closed trade {trade['order_id']} due to profit/loss condition")            current_time = time.time()            holding_time = current_time - trade['open_time']            if holding_time >= 3600:                close_order(trade['order_id'])                logger.info(f"Closed trade {trade['order_id']} due to holding time condition")        except Exception as e:            logger.error(f"Error closing trade {trade['order_id']}: {e}")
\ No newline at end of file
+import MetaTrader5 as mt5import timefrom concurrent.futures import ThreadPoolExecutorfrom utils.logger import setup_loggingfrom utils.data_fetcher import fetch_market_data, fetch_sentiment_analysisfrom utils.model_trainer import predict_batchfrom utils.broker_state import BrokerSnapshot, SymbolCache, account_dict, position_dictfrom utils.metrics import timed, returned_nonelogger = setup_logging('trading.log')def initialize_mt5():    if not mt5.initialize():        logger.error("initialize() failed, error code = %s", mt5.last_error())        return False    return Truesymbol_cache = SymbolCache()# order_send retcodes after which the order is sent once more at the price returned with themREQUOTE_RETCODES = (mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_CHANGED)def take_snapshot(symbols):    return BrokerSnapshot.take(symbols, symbol_cache)def get_account_state():    account_info = mt5.account_info()    if account_info is None:        logger.error("Failed to get account info, error code = %s", mt5.last_error())        return None    return account_dict(account_info)def get_open_trades():    open_positions = mt5.positions_get()    if open_positions is None:        logger.error("Failed to get open positions, error code = %s", mt5.last_error())        return []    return [position_dict(position) for position in open_positions]def quote(pair, direction, snapshot):    if snapshot is not None:        return snapshot.price(pair, direction)    tick = mt5.symbol_info_tick(pair)    if tick is None:        logger.error(f"Failed to get tick for {pair}, error code = %s", mt5.last_error())        return None    return tick.ask if direction == 'buy' else tick.biddef send_order(build_request, pair, direction, snapshot):    # With a snapshot the price comes from it; a requote carries the current bid/ask, which the retry then uses    result = None    for attempt in range(2):        price = quote(pair, direction, snapshot)        if price is None:            return None        request = build_request(price)        result = mt5.order_send(request)        if snapshot is not None:            snapshot.apply(request, result)        if result is None or result.retcode not in REQUOTE_RETCODES:            break    return result@timed('place_order', failed=returned_none)def place_order(pair, direction, lot_size, snapshot=None):    symbol_info = symbol_cache.get(pair)    if symbol_info is None:        return None    point = symbol_info.point    build_request = lambda price: {        "action": mt5.TRADE_ACTION_DEAL,        "symbol": pair,        "volume": lot_size,        "type": mt5.ORDER_TYPE_BUY if direction == 'buy' else mt5.ORDER_TYPE_SELL,        "price": price,        "sl": price - 100 * point if direction == 'buy' else price + 100 * point,        "tp": price + 100 * point if direction == 'buy' else price - 100 * point,        "deviation": 10,        "magic": 234000,        "comment": "Python script order",        "type_time": mt5.ORDER_TIME_GTC,        "type_filling": mt5.ORDER_FILLING_IOC,    }    result = send_order(build_request, pair, direction, snapshot)    if result is None:        logger.error("Failed to place order, error code = %s", mt5.last_error())        return None    if result.retcode != mt5.TRADE_RETCODE_DONE:        logger.error(f"Failed to place order, retcode = {result.retcode} ({result.comment})")        return None    return result@timed('close_order', failed=returned_none)def close_order(order_id, snapshot=None):    if snapshot is not None:        position = snapshot.position(order_id)    else:        positions = mt5.positions_get(ticket=order_id)        position = position_dict(positions[0]) if positions else None    if position is None:        logger.error(f"Failed to find position with ticket {order_id}, error code = %s", mt5.last_error())        return None    # A buy is closed by selling at the bid, a sell by buying at the ask    direction = 'sell' if position['direction'] == 'buy' else 'buy'    build_request = lambda price: {        "action": mt5.TRADE_ACTION_DEAL,        "symbol": position['pair'],        "volume": position['lots'],        "type": mt5.ORDER_TYPE_SELL if direction == 'sell' else mt5.ORDER_TYPE_BUY,        "position": position['order_id'],        "price": price,        "deviation": 10,        "magic": 234000,        "comment": "Python script order close",        "type_time": mt5.ORDER_TIME_GTC,        "type_filling": mt5.ORDER_FILLING_IOC,    }    result = send_order(build_request, position['pair'], direction, snapshot)    if result is None:        logger.error("Failed to close order, error code = %s", mt5.last_error())        return None    if result.retcode != mt5.TRADE_RETCODE_DONE:        logger.error(f"Failed to close order, retcode = {result.retcode} ({result.comment})")        return None    return resultFEATURE_COLUMNS = ['SMA', 'EMA', 'MACD', 'MACD_signal', 'RSI', 'BB_upper', 'BB_lower']def fetch_pair_inputs(pair):    try:        data = fetch_market_data(pair)        if data is None:            return None        return data, fetch_sentiment_analysis(pair)    except Exception as e:        logger.error(f"Error fetching inputs for {pair}: {e}")        return Nonedef submit_order(pair, trade_direction, lot_size, snapshot=None):    # Runs on the order executor thread, so the open-trade count includes orders placed earlier this cycle    open_trades = snapshot.open_trades() if snapshot is not None else get_open_trades()    if len(open_trades) >= 5:        logger.warning(f"Maximum open trades reached for {pair}")        return None    order_result = place_order(pair, trade_direction, lot_size, snapshot)    if order_result:        logger.info(f"Placed {trade_direction} order for {pair} with lot size {lot_size}: {order_result}")    else:        logger.error(f"Failed to place {trade_direction} order for {pair} with lot size {lot_size}")    return order_resultdef execute_trades(models, xgb_models, currency_pairs, snapshot, order_executor, fetch_workers=8, trade_volume=0.01):    # snapshot is the cycle's BrokerSnapshot; account figures are taken from it and order prices are its quotes    account_state = snapshot.account    equity = account_state['equity']    cycle_start = time.perf_counter()    pairs = [pair for pair in currency_pairs if pair in models]    # Stage 1: network-bound fetches on a bounded pool    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:        fetched = dict(zip(pairs, pool.map(fetch_pair_inputs, pairs)))    fetched = {pair: result for pair, result in fetched.items() if result is not None}    fetch_time = time.perf_counter() - cycle_start    # Stage 2: one batched inference call per model family    stage_start = time.perf_counter()    # XGBoost takes the last 10 bars of indicator features; the LSTMs take the last 10 closes newest-first, the    # layout they were trained on and the EA sends    inputs = {}    lstm_inputs = {}    for pair, (data, _) in fetched.items():        inputs[pair] = data[FEATURE_COLUMNS].tail(10).values.reshape(1, 10, 7)        lstm_inputs[pair] = data['Close'].to_numpy(dtype=float)[-10:][::-1].reshape(1, 10, 1)        xgb_models.observe(pair, data)    predictions, errors = predict_batch(models, lstm_inputs)    for pair, error in errors.items():        logger.error(f"Error trading {pair}: {error}")    xgb_predictions = xgb_models.predict_batch(inputs)    inference_time = time.perf_counter() - stage_start    # Stage 3: decisions, then orders serialized through the MT5 executor. Quotes are re-read first in one call,    # since they are as old as the fetch and inference stages by now.    stage_start = time.perf_counter()    order_executor.call(snapshot.refresh_ticks)    lot_size = (equity * 0.01) / 100000    # trade_volume from the config is the smallest lot placed    lot_size = max(min(lot_size, 100), trade_volume)    orders = []    for pair, prediction in predictions.items():        try:            xgb_prediction = xgb_predictions.get(pair)            if xgb_prediction is None:                logger.warning(f"No XGBoost model for {pair}, skipping")                continue            data, sentiment_score = fetched[pair]            trend = data['SMA'].iloc[-1] > data['EMA'].iloc[-1]            volatile = data['ATR'].iloc[-1] > data['ATR'].mean() * 1.5            if sentiment_score > 0 and trend and not volatile:                trade_direction = 'buy' if prediction > 0.5 and xgb_prediction > 0.5 else 'sell'            else:                trade_direction = 'sell' if prediction > 0.5 and xgb_prediction > 0.5 else 'buy'            if account_state['free_margin'] > lot_size * 100000 / 50:                orders.append((pair, order_executor.place(submit_order, pair, trade_direction, lot_size, snapshot)))            else:                logger.warning(f"Insufficient free margin to place new trade for {pair}")        except Exception as e:            logger.error(f"Error trading {pair}: {e}")    for pair, future in orders:        try:            future.result()        except Exception as e:            logger.error(f"Error trading {pair}: {e}")    order_time = time.perf_counter() - stage_start    stats = {        'pairs': len(pairs),        'fetched': len(fetched),        'orders': len(orders),        'fetch': fetch_time,        'inference': inference_time,        'execution': order_time,        'total': time.perf_counter() - cycle_start,    }    logger.info(f"Trading cycle for {stats['pairs']} pairs took {stats['total']:.2f}s "                f"(fetch {fetch_time:.2f}s, inference {inference_time:.2f}s, orders {order_time:.2f}s, {len(orders)} orders)")    return statsdef close_open_trades(snapshot=None):    # Without a snapshot one is taken for the symbols of the open positions    if snapshot is None:        snapshot = take_snapshot([])    open_trades = snapshot.open_trades()    for trade in open_trades:        try:            if trade['profit'] >= 100 or trade['loss'] <= -50:                close_order(trade['order_id'], snapshot)                logger.info(f"Closed trade {trade['order_id']} due to profit/loss condition")            current_time = time.time()            holding_time = current_time - trade['open_time']            if holding_time >= 3600:                close_order(trade['order_id'], snapshot)                logger.info(f"Closed trade {trade['order_id']} due to holding time condition")        except Exception as e:            logger.error(f"Error closing trade {trade['order_id']}: {e}")
\ No newline at end of file
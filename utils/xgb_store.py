@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from xgboost import XGBClassifier
+from utils.logger import setup_logging
+from utils.metrics import timed
+
+logger = setup_logging('trading_app.log')
+
+FEATURE_COLUMNS = ['SMA', 'EMA', 'MACD', 'MACD_signal', 'RSI', 'BB_upper', 'BB_lower']
+LOOK_BACK = 10
+# The bars the live loop fetches (fetch_bars' interval), so models are trained on what they predict and refresh on
+TIMEFRAME = '1h'
+
+def naive_utc(index):
+    if getattr(index, 'tz', None) is not None:
+        return index.tz_convert(None)
+    return index
+
+def create_xgb_dataset(data, look_back=LOOK_BACK):
+    # Each sample is a flattened look_back x features window; the label is whether the next close is higher
+    features = data[FEATURE_COLUMNS].to_numpy(dtype=float)
+    close = data['Close'].to_numpy(dtype=float)
+    if len(data) <= look_back:
+        return np.empty((0, look_back * len(FEATURE_COLUMNS))), np.empty(0, dtype=int), naive_utc(data.index[:0])
+    windows = sliding_window_view(features, (look_back, features.shape[1]))[:-1, 0]
+    X = windows.reshape(len(windows), -1)
+    y = (close[look_back:] > close[look_back - 1:-1]).astype(int)
+    label_times = naive_utc(data.index[look_back:])
+    valid = ~np.isnan(X).any(axis=1)
+    return X[valid], y[valid], label_times[valid]
+
+def train_xgboost_model(data, model=None, n_estimators=100):
+    X, y, _ = create_xgb_dataset(data)
+    return fit_xgboost_model(X, y, model, n_estimators)
+
+def fit_xgboost_model(X, y, model=None, n_estimators=100):
+    # With a previous model, boosting continues from its trees instead of starting over
+    xgb_model = XGBClassifier(n_estimators=n_estimators, max_depth=3, learning_rate=0.1, eval_metric='logloss')
+    xgb_model.fit(X, y, xgb_model=model.get_booster() if model is not None else None)
+    return xgb_model
+
+def accuracy(model, X, y):
+    if len(y) == 0:
+        return None
+    return float((model.predict(X) == y).mean())
+
+class XGBModelStore:
+    def __init__(self, currency_pairs, model_dir='models', refresh_interval=3600, drift_threshold=0.1, min_new_bars=24, refresh_estimators=10,
+                 max_trees=300, refit_estimators=100):
+        self.currency_pairs = list(currency_pairs)
+        self.model_dir = model_dir
+        self.refresh_interval = refresh_interval
+        self.drift_threshold = drift_threshold
+        self.min_new_bars = min_new_bars
+        self.refresh_estimators = refresh_estimators
+        # Warm starts add 2 x refresh_estimators trees; a model that would pass max_trees is refit from scratch on the
+        # recent window instead
+        self.max_trees = max_trees
+        self.refit_estimators = refit_estimators
+        self.models = {}
+        self.meta = {}
+        self.latest_data = {}
+        self.refresh_lock = threading.Lock()
+
+    def model_path(self, pair):
+        return os.path.join(self.model_dir, f'xgb_model_{pair}.json')
+
+    def meta_path(self, pair):
+        return os.path.join(self.model_dir, f'xgb_model_{pair}.meta.json')
+
+    def load_all(self):
+        return self.load_pairs(self.currency_pairs)
+
+    def add_pairs(self, currency_pairs):
+        # Pairs added to the config after startup are loaded on the next trading cycle
+        new = [pair for pair in currency_pairs if pair not in self.currency_pairs]
+        if new:
+            self.currency_pairs.extend(new)
+            self.load_pairs(new)
+        return self
+
+    def load_pairs(self, currency_pairs):
+        for pair in currency_pairs:
+            if not os.path.exists(self.model_path(pair)):
+                logger.warning(f"No XGBoost model for {pair}, run train_models.py")
+                continue
+            try:
+                model = XGBClassifier()
+                model.load_model(self.model_path(pair))
+                with open(self.meta_path(pair), 'r') as f:
+                    self.meta[pair] = json.load(f)
+                self.models[pair] = model
+            except Exception as e:
+                logger.error(f"Error loading XGBoost model for {pair}: {e}")
+        logger.info(f"Loaded {len(self.models)} XGBoost models")
+        return self
+
+    def save(self, pair, model, last_bar, baseline_accuracy):
+        os.makedirs(self.model_dir, exist_ok=True)
+        model.save_model(self.model_path(pair))
+        meta = {
+            'last_bar': str(last_bar),
+            'trained_at': time.time(),
+            'accuracy': baseline_accuracy,
+            'trees': model.get_booster().num_boosted_rounds(),
+        }
+        with open(self.meta_path(pair), 'w') as f:
+            json.dump(meta, f, indent=4)
+        self.models[pair] = model
+        self.meta[pair] = meta
+
+    def fit_holdout(self, X, y, model=None, n_estimators=100):
+        # Fit on the first 80%, measure out-of-sample accuracy on the rest, then continue boosting on it. The accuracy is
+        # the model's own baseline for later drift checks.
+        split = int(len(X) * 0.8)
+        model = fit_xgboost_model(X[:split], y[:split], model, n_estimators)
+        baseline_accuracy = accuracy(model, X[split:], y[split:])
+        model = fit_xgboost_model(X[split:], y[split:], model, self.refresh_estimators)
+        return model, baseline_accuracy
+
+    def train(self, pair, data, n_estimators=100):
+        # Offline path, on TIMEFRAME bars
+        X, y, label_times = create_xgb_dataset(data)
+        model, baseline_accuracy = self.fit_holdout(X, y, n_estimators=n_estimators)
+        self.save(pair, model, label_times[-1], baseline_accuracy)
+        return model
+
+    def predict(self, pair, prediction_input):
+        model = self.models.get(pair)
+        if model is None:
+            return None
+        return float(model.predict_proba(prediction_input.reshape(len(prediction_input), -1))[0, 1])
+
+    @timed('xgb_predict')
+    def predict_batch(self, inputs):
+        predictions = {}
+        for pair, prediction_input in inputs.items():
+            prediction = self.predict(pair, prediction_input)
+            if prediction is not None:
+                predictions[pair] = prediction
+        return predictions
+
+    def observe(self, pair, data):
+        self.latest_data[pair] = data
+
+    def refresh_due(self):
+        # Runs off the trading thread; warm-starts a pair on bars it has not seen once it is stale or drifting,
+        # or refits it on the whole recent window once warm starts would take it past max_trees
+        if not self.refresh_lock.acquire(blocking=False):
+            return
+        try:
+            for pair, data in list(self.latest_data.items()):
+                model = self.models.get(pair)
+                if model is None:
+                    continue
+                start = time.perf_counter()
+                X, y, label_times = create_xgb_dataset(data)
+                new = label_times > pd.Timestamp(self.meta[pair]['last_bar'])
+                if new.sum() < self.min_new_bars:
+                    continue
+                recent_accuracy = accuracy(model, X[new], y[new])
+                baseline_accuracy = self.meta[pair].get('accuracy')
+                stale = time.time() - self.meta[pair]['trained_at'] >= self.refresh_interval
+                drifted = baseline_accuracy is not None and baseline_accuracy - recent_accuracy > self.drift_threshold
+                if not (stale or drifted):
+                    continue
+                refit = model.get_booster().num_boosted_rounds() + 2 * self.refresh_estimators > self.max_trees
+                try:
+                    if refit:
+                        model, new_accuracy = self.fit_holdout(X, y, n_estimators=self.refit_estimators)
+                    else:
+                        model, new_accuracy = self.fit_holdout(X[new], y[new], model, self.refresh_estimators)
+                    self.save(pair, model, label_times[-1], new_accuracy)
+                except Exception as e:
+                    logger.error(f"Error refreshing XGBoost model for {pair}: {e}")
+                    continue
+                logger.info(f"{'Refit' if refit else 'Refreshed'} XGBoost model for {pair} on {len(y) if refit else int(new.sum())} bars in {time.perf_counter() - start:.3f}s "
+                            f"({'drift' if drifted else 'schedule'}, accuracy {recent_accuracy:.3f} before, "
+                            f"{'n/a' if new_accuracy is None else f'{new_accuracy:.3f}'} after)")
+        finally:
+            self.refresh_lock.release()